@@ -0,0 +1,276 @@
+"""Flat, memory-mappable model artifact.
+
+`heart_model.pkl` is unpickled privately by every worker. The artifact
+format stores the fitted parameters (a nearest-neighbour model's reference
+rows, or a linear model's coefficients) as raw little-endian arrays behind a
+small JSON header, so loading is an mmap: all processes share one
+page-cached copy and start-up does not grow with the model.
+
+Layout::
+
+    b"HEARTMDL" | uint32 format version | uint32 header length | JSON header
+    zero padding to a 64-byte boundary | arrays at the offsets in the header
+
+Export and compare with the pickle path::
+
+    python artifact.py export heart_model.pkl heart_model.bin
+    python artifact.py compare heart_model.pkl heart_model.bin
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b"HEARTMDL"
+# 2: nearest-neighbour artifacts also carry the engine's grouped search layout
+# (group_* arrays); version 1 files still load and the engine builds it itself
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _knn_parameters(model):
+    from engine import grouped_index
+
+    arrays = {
+        "fit_X": np.ascontiguousarray(model._fit_X, dtype="<f8"),
+        "y": np.ascontiguousarray(model._y, dtype="<i8"),
+    }
+    params = {
+        "n_neighbors": int(model.n_neighbors),
+        "weights": model.weights,
+        "p": model.p,
+        "metric": model.metric,
+    }
+    # The engine's search layout, mapped as is on load instead of rebuilt per process
+    index = {f"group_{name}": np.ascontiguousarray(array, dtype="<f8" if array.dtype.kind == "f" else "<i8")
+             for name, array in grouped_index(arrays["fit_X"], arrays["y"]).items()}
+    return "knn", params, arrays, index
+
+
+def _linear_parameters(model):
+    arrays = {
+        "coef": np.ascontiguousarray(model.coef_, dtype="<f8"),
+        "intercept": np.ascontiguousarray(model.intercept_, dtype="<f8"),
+    }
+    params = {
+        "estimator": type(model).__name__,
+        "settings": model.get_params(),
+        # SGD's step-size schedule continues from here in later partial_fit calls
+        "t": float(getattr(model, "t_", 0.0)),
+    }
+    return "linear", params, arrays, {}
+
+
+_EXPORTERS = {
+    "KNeighborsClassifier": _knn_parameters,
+    "LogisticRegression": _linear_parameters,
+    "SGDClassifier": _linear_parameters,
+}
+
+
+def export_model(model, path, model_version=None, metadata=None):
+    """Write a fitted model's parameters to `path` and return its version.
+
+    The version defaults to a content hash of the parameter arrays, so
+    re-exporting an unchanged model yields the same version. `metadata` is
+    any JSON-serializable dict, stored in the header as-is. Arrays derived
+    from the parameters for the engine are stored too, but not hashed.
+    """
+    exporter = _EXPORTERS.get(type(model).__name__)
+    if exporter is None:
+        raise TypeError(f"cannot export {type(model).__name__} to the artifact format")
+    kind, params, arrays, derived = exporter(model)
+
+    if model_version is None:
+        digest = hashlib.sha256()
+        for array in arrays.values():
+            digest.update(array.tobytes())
+        model_version = digest.hexdigest()[:12]
+    arrays = {**arrays, **derived}
+
+    header = {
+        "kind": kind,
+        "model_version": model_version,
+        "params": params,
+        "classes": np.asarray(model.classes_).tolist(),
+        "feature_names": [str(name) for name in getattr(model, "feature_names_in_", [])],
+        "metadata": metadata or {},
+        "arrays": {},
+    }
+    # Array offsets depend on the header length, so repeat until it settles
+    header_bytes = b""
+    while len(header_bytes) != len(json.dumps(header).encode()):
+        header_bytes = json.dumps(header).encode()
+        offset = _align(_PREAMBLE.size + len(header_bytes))
+        for name, array in arrays.items():
+            header["arrays"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = _align(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode()
+
+    with open(path, "wb") as file:
+        file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.write(b"\0" * (header["arrays"][name]["offset"] - file.tell()))
+            file.write(array.tobytes())
+    return model_version
+
+
+def read_header(path):
+    with open(path, "rb") as file:
+        magic, version, length = _PREAMBLE.unpack(file.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a model artifact")
+        if version not in READABLE_VERSIONS:
+            raise ValueError(f"{path} uses artifact format {version}; this reader supports "
+                             f"{', '.join(map(str, READABLE_VERSIONS))}")
+        return json.loads(file.read(length))
+
+
+def _load_linear(header, arrays, classes):
+    import sklearn.linear_model
+
+    params = header["params"]
+    model = getattr(sklearn.linear_model, params["estimator"])(**params["settings"])
+    model.coef_ = arrays["coef"]
+    model.intercept_ = arrays["intercept"]
+    model.classes_ = classes
+    model.n_features_in_ = arrays["coef"].shape[1]
+    if params["estimator"] == "SGDClassifier":
+        model.t_ = params["t"]
+    return model
+
+
+def _map(path):
+    header = read_header(path)
+    arrays = {
+        name: np.memmap(path, dtype=spec["dtype"], mode="r", offset=spec["offset"], shape=tuple(spec["shape"]))
+        for name, spec in header["arrays"].items()
+    }
+    return header, arrays, np.asarray(header["classes"])
+
+
+def load_engine(path):
+    """Load an artifact straight into its inference engine (see engine.py).
+
+    Nothing from scikit-learn is imported, which takes most of a cold
+    start. Returns None for models the engines do not cover.
+    """
+    from engine import KNNEngine, LinearEngine
+
+    header, arrays, classes = _map(path)
+    params = header["params"]
+    if header["kind"] == "knn" and params.get("metric") in ("minkowski", "euclidean") and params.get("p", 2) == 2:
+        # Artifacts exported before the grouped layout was stored build it on load
+        index = ({name[len("group_"):]: array for name, array in arrays.items() if name.startswith("group_")}
+                 or None)
+        engine = KNNEngine(arrays["fit_X"], arrays["y"], classes, params["n_neighbors"], params["weights"],
+                           header["model_version"], index)
+    elif header["kind"] == "linear" and len(classes) == 2 and params["settings"].get("loss", "log_loss") == "log_loss":
+        engine = LinearEngine(arrays["coef"], arrays["intercept"], classes, header["model_version"])
+    else:
+        return None
+    engine.metadata = header.get("metadata", {})
+    return engine
+
+
+def load_artifact(path):
+    """Load a model whose parameter arrays are memory-mapped from `path`.
+
+    The returned estimator has `model_version` set from the artifact header.
+    """
+    header, arrays, classes = _map(path)
+    if header["kind"] == "linear":
+        model = _load_linear(header, arrays, classes)
+        model.model_version = header["model_version"]
+        model.metadata = header.get("metadata", {})
+        return model
+    if header["kind"] != "knn":
+        raise ValueError(f"{path} holds an unsupported model kind {header['kind']!r}")
+
+    from sklearn.neighbors import KNeighborsClassifier
+
+    # Fit on a single row to set up the estimator, then attach the mapped
+    # arrays: a full fit would re-validate (and touch) every row, and a tree
+    # index would copy the reference matrix into private memory. Brute-force
+    # search runs directly on the mapping.
+    model = KNeighborsClassifier(algorithm="brute", **header["params"])
+    model.fit(arrays["fit_X"][:1], classes[:1])
+    model._fit_X = arrays["fit_X"]
+    model._y = arrays["y"]
+    model.classes_ = classes
+    model.n_samples_fit_ = len(arrays["fit_X"])
+    model.model_version = header["model_version"]
+    model.metadata = header.get("metadata", {})
+    return model
+
+
+def resident_memory_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_load(path):
+    """Load `path` (pickle or artifact) and return (model, seconds, resident MB added)."""
+    from scoring import load_model
+
+    before = resident_memory_mb()
+    start = time.perf_counter()
+    model = load_model(path)
+    seconds = time.perf_counter() - start
+    return model, seconds, resident_memory_mb() - before
+
+
+def compare(pickle_path, artifact_path):
+    """Measure each loader in a fresh interpreter so neither warms the other."""
+    for path in (pickle_path, artifact_path):
+        code = (
+            "import warnings; warnings.simplefilter('ignore');"
+            "import sklearn.neighbors, artifact;"
+            f"_, s, mb = artifact.measure_load({path!r});"
+            f"print(f'{path}: {{s * 1000:.1f}} ms, {{mb:+.1f}} MB resident')"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and inspect memory-mapped model artifacts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="convert a pickled model to the artifact format")
+    export.add_argument("source")
+    export.add_argument("destination")
+    export.add_argument("--model-version")
+    check = commands.add_parser("compare", help="report load time and memory for both formats")
+    check.add_argument("pickle_path")
+    check.add_argument("artifact_path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from scoring import load_model
+
+        version = export_model(load_model(args.source), args.destination, args.model_version)
+        print(f"Wrote {args.destination} (model version {version})")
+    else:
+        compare(args.pickle_path, args.artifact_path)
+
+
+if __name__ == "__main__":
+    main()
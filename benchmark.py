@@ -0,0 +1,159 @@
+"""Benchmarks for model loading, scoring latency, batch throughput and ingest.
+
+Inputs are fixed rows of `Cleaned Heart Attack Prediction Dataset.csv`
+(seeded sample), so runs are comparable across commits and models.
+
+    python benchmark.py --output bench_results.json
+    python benchmark.py --baseline benchmark_baseline.json      # fail on regressions
+    python benchmark.py --save-baseline benchmark_baseline.json
+
+Results are JSON: one entry per metric with its value, unit and whether
+lower or higher is better. A metric regresses when it is worse than the
+baseline by more than --tolerance (a fraction, default 0.5; timings on
+shared hosts routinely move by 30%).
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from features import model_matrix
+from scoring import ARTIFACT_PATH, MODEL_PATH, load_model, load_scorer, predict_risk
+
+CLEANED_PATH = "Cleaned Heart Attack Prediction Dataset.csv"
+RAW_PATH = "Heart_Attack_Prediction_Dataset.csv"
+BATCH_SIZES = [1, 100, 1_000, 10_000]
+SEED = 0
+
+
+def _timings(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return np.array(samples)
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _metric(value, unit, better):
+    return {"value": round(float(value), 6), "unit": unit, "better": better}
+
+
+def run(model_path=None, single_rows=2000, repeat=50):
+    import pandas as pd
+
+    results = {}
+
+    # Model load
+    for name, path in (("pickle", MODEL_PATH), ("artifact", ARTIFACT_PATH)):
+        try:
+            load_model(path)
+        except FileNotFoundError:
+            continue
+        seconds = _timings(lambda: load_model(path), repeat)
+        results[f"load_{name}_ms"] = _metric(np.median(seconds) * 1e3, "ms", "lower")
+
+    scorer = load_scorer(model_path)
+    frame = pd.read_csv(CLEANED_PATH)
+    X = model_matrix(frame)
+    rng = np.random.default_rng(SEED)
+
+    # Single-patient latency: feature assembly plus scoring, one row per call
+    rows = frame.iloc[rng.integers(0, len(frame), single_rows)]
+    records = [row.to_frame().T for _, row in rows.iterrows()]
+    predict_risk(scorer, model_matrix(records[0]))
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        predict_risk(scorer, model_matrix(record))
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1e3
+    for q in (50, 95, 99):
+        results[f"single_p{q}_ms"] = _metric(np.percentile(latencies, q), "ms", "lower")
+
+    # Batch throughput
+    for size in BATCH_SIZES:
+        batch = X[rng.integers(0, len(X), size)]
+        calls = max(5, min(repeat, 200_000 // size))
+        seconds = _timings(lambda: predict_risk(scorer, batch), calls)
+        results[f"batch_{size}_rows_per_s"] = _metric(size / np.median(seconds), "rows/s", "higher")
+    batch = X[rng.integers(0, len(X), BATCH_SIZES[-1])]
+    results[f"batch_{BATCH_SIZES[-1]}_peak_mb"] = _metric(
+        _peak_mb(lambda: predict_risk(scorer, batch)), "MB", "lower")
+
+    # Data ingest
+    results["parse_cleaned_csv_ms"] = _metric(
+        np.median(_timings(lambda: pd.read_csv(CLEANED_PATH), 15)) * 1e3, "ms", "lower")
+    results["parse_cleaned_csv_peak_mb"] = _metric(_peak_mb(lambda: pd.read_csv(CLEANED_PATH)), "MB", "lower")
+    from pipeline import clean
+
+    results["parse_and_clean_raw_csv_ms"] = _metric(
+        np.median(_timings(lambda: clean(pd.read_csv(RAW_PATH)), 15)) * 1e3, "ms", "lower")
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "model_version": getattr(scorer, "model_version", None),
+        },
+        "metrics": results,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """Return a description of every metric worse than baseline by more than tolerance."""
+    found = []
+    for name, reference in baseline["metrics"].items():
+        current = results["metrics"].get(name)
+        if current is None or not reference["value"]:
+            continue
+        change = current["value"] / reference["value"] - 1
+        worse = change > tolerance if reference["better"] == "lower" else change < -tolerance
+        if worse:
+            found.append(f"{name}: {reference['value']:g} -> {current['value']:g} {current['unit']} ({change:+.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model loading, scoring and data ingest.")
+    parser.add_argument("--model", help="model file to score with (defaults to the artifact, then the pickle)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON and fail on regressions")
+    parser.add_argument("--save-baseline", help="write results JSON as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = run(args.model)
+    for name, metric in results["metrics"].items():
+        print(f"{name:<32} {metric['value']:>14,.3f} {metric['unit']}")
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(results, json.load(file), args.tolerance)
+        if found:
+            print(f"\n{len(found)} regression(s) against {args.baseline}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
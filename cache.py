@@ -0,0 +1,94 @@
+"""Bounded LRU cache of prediction results.
+
+Entries are keyed on a hash of the loaded model's version and the canonical
+bytes of the scaled feature vector, so identical patients are scored once
+per model and a new model never serves an old model's results.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from scoring import predict_risk
+
+
+def model_version(model):
+    return str(getattr(model, "model_version", None) or id(model))
+
+
+def vector_key(version, x):
+    """Hash a model version and one feature vector into a cache key."""
+    # Round away float noise from the form/CSV path and fold -0.0 into 0.0
+    canonical = np.round(np.asarray(x, dtype=np.float64), 12) + 0.0
+    digest = hashlib.blake2b(version.encode(), digest_size=16)
+    digest.update(canonical.tobytes())
+    return digest.digest()
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def predict_risk(self, model, X, record=False):
+        """Cached drop-in for scoring.predict_risk.
+
+        Rows already in the cache are answered from it; the rest are scored
+        together in one call and stored.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        version = model_version(model)
+        keys = [vector_key(version, x) for x in X]
+        labels = np.empty(len(X), dtype=model.classes_.dtype)
+        high_risk = np.empty(len(X))
+        missing = []
+        for i, key in enumerate(keys):
+            value = self.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                labels[i], high_risk[i] = value
+        if missing:
+            labels[missing], high_risk[missing] = predict_risk(model, X[missing], record)
+            for i in missing:
+                self.put(keys[i], (labels[i], high_risk[i]))
+        return labels, high_risk
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
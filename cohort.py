@@ -0,0 +1,222 @@
+"""Precomputed cohort aggregates for population analytics.
+
+A cohort is any combination of Country, Continent, age band and sex, with
+each dimension either fixed or left open ("all"). `CohortIndex` keeps one
+cell per cohort that occurs in the data, for every subset of the
+dimensions, so any filter or drill-down is a dictionary lookup. A cell
+holds the row count, the number of high-risk rows, per-measure sums and
+sums of squares, and a fixed-bin histogram per measure as a quantile
+sketch. Adding labelled rows updates the affected cells in place.
+
+    index = CohortIndex().add(load_dataset("Heart_Attack_Prediction_Dataset.csv"))
+    index.summary(country="Germany", age_band="60-69")
+
+    python cohort.py                                  # build time and a sample query
+"""
+import argparse
+import time
+from itertools import product
+
+import numpy as np
+
+from features import COUNTRY_CONTINENTS
+from pipeline import clean, is_raw
+
+RAW_PATH = "Heart_Attack_Prediction_Dataset.csv"
+
+DIMENSIONS = ("Country", "Continent", "Age Band", "Sex")
+
+AGE_BANDS = ["18-29", "30-39", "40-49", "50-59", "60-69", "70-79", "80-90"]
+_AGE_EDGES = np.array([30, 40, 50, 60, 70, 80])
+
+# Measures with a histogram sketch, and the (low, high) range of its bins
+MEASURES = {
+    "Age": (18, 91),
+    "Cholesterol": (120, 401),
+    "Systolic_BP": (90, 181),
+    "Diastolic_BP": (60, 111),
+    "Heart Rate": (40, 111),
+    "BMI": (18, 40),
+    "Triglycerides": (30, 801),
+    "Stress Level": (1, 11),
+    "Sleep Hours Per Day": (4, 11),
+    "Exercise Hours Per Week": (0, 20),
+    "Sedentary Hours Per Day": (0, 12),
+    "Income": (20_000, 300_000),
+}
+# 0/1 conditions, summarized as prevalence
+FLAGS = ["Diabetes", "Family History", "Smoking", "Obesity", "Alcohol Consumption",
+         "Previous Heart Problems", "Medication Use"]
+BINS = 64
+
+
+def age_band(age):
+    return np.asarray(AGE_BANDS)[np.searchsorted(_AGE_EDGES, np.asarray(age), side="right")]
+
+
+def cohort_of(patient):
+    """Cohort filters (as summary() keywords) for a one-row cleaned-schema mapping."""
+    country = str(np.asarray(patient["Country"])[0])
+    return {"country": country, "continent": COUNTRY_CONTINENTS.get(country),
+            "age_band": str(age_band(np.asarray(patient["Age"])[:1])[0]), "sex": str(np.asarray(patient["Sex"])[0])}
+
+
+class CohortIndex:
+    def __init__(self):
+        self.values = {dimension: set() for dimension in DIMENSIONS}
+        self._cells = {}
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._risk = np.zeros(0, dtype=np.int64)
+        self._sums = np.zeros((0, len(MEASURES) + len(FLAGS)))
+        self._squares = np.zeros((0, len(MEASURES)))
+        self._histograms = np.zeros((0, len(MEASURES), BINS), dtype=np.int64)
+        self._low = np.array([low for low, _ in MEASURES.values()], dtype=np.float64)
+        self._width = np.array([(high - low) / BINS for low, high in MEASURES.values()])
+
+    def __len__(self):
+        return len(self._cells)
+
+    @property
+    def rows(self):
+        return int(self._counts[self._cells[(None,) * len(DIMENSIONS)]]) if self._cells else 0
+
+    def _cell_ids(self, keys):
+        new = [key for key in dict.fromkeys(keys) if key not in self._cells]
+        if new:
+            start = len(self._cells)
+            self._cells.update((key, start + i) for i, key in enumerate(new))
+            grow = len(new)
+            self._counts = np.concatenate([self._counts, np.zeros(grow, dtype=np.int64)])
+            self._risk = np.concatenate([self._risk, np.zeros(grow, dtype=np.int64)])
+            self._sums = np.concatenate([self._sums, np.zeros((grow, self._sums.shape[1]))])
+            self._squares = np.concatenate([self._squares, np.zeros((grow, self._squares.shape[1]))])
+            self._histograms = np.concatenate(
+                [self._histograms, np.zeros((grow,) + self._histograms.shape[1:], dtype=np.int64)])
+        return np.array([self._cells[key] for key in keys], dtype=np.intp)
+
+    def add(self, frame):
+        """Fold labelled rows (raw or cleaned layout) into the index; returns self."""
+        continent = (np.asarray(frame["Continent"], dtype=str) if "Continent" in frame
+                     else np.array([COUNTRY_CONTINENTS[c] for c in np.asarray(frame["Country"], dtype=str)]))
+        if is_raw(frame):
+            frame = clean(frame)
+        labels = {
+            "Country": np.asarray(frame["Country"], dtype=str),
+            "Continent": continent,
+            "Age Band": age_band(frame["Age"]),
+            "Sex": np.asarray(frame["Sex"], dtype=str),
+        }
+        for dimension, values in labels.items():
+            self.values[dimension].update(np.unique(values).tolist())
+
+        measures = np.column_stack([np.asarray(frame[m], dtype=np.float64) for m in MEASURES])
+        values = np.column_stack([measures] + [np.asarray(frame[f], dtype=np.float64) for f in FLAGS])
+        bins = np.clip(((measures - self._low) / self._width).astype(np.intp), 0, BINS - 1)
+        risk = np.asarray(frame["Heart Attack Risk"], dtype=np.int64)
+
+        codes, uniques = [], []
+        for dimension in DIMENSIONS:
+            unique, inverse = np.unique(labels[dimension], return_inverse=True)
+            uniques.append(unique)
+            codes.append(inverse.ravel())
+        # One pass per subset of dimensions: rows sharing a key land in the same cell
+        for fixed in product((False, True), repeat=len(DIMENSIONS)):
+            combined = np.zeros(len(risk), dtype=np.int64)
+            for keep, code, unique in zip(fixed, codes, uniques):
+                combined = combined * len(unique) + (code if keep else 0)
+            combos, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+            keys = [tuple(unique[code[row]] if keep else None for keep, code, unique in zip(fixed, codes, uniques))
+                    for row in first]
+            cells = self._cell_ids(keys)[inverse.ravel()]
+            self._counts += np.bincount(cells, minlength=len(self._counts))
+            self._risk += np.bincount(cells, weights=risk, minlength=len(self._risk)).astype(np.int64)
+            np.add.at(self._sums, cells, values)
+            np.add.at(self._squares, cells, measures ** 2)
+            np.add.at(self._histograms, (cells[:, None], np.arange(len(MEASURES)), bins), 1)
+        return self
+
+    def _cell(self, country=None, continent=None, age_band=None, sex=None):
+        return self._cells.get((country, continent, age_band, sex))
+
+    def count(self, **filters):
+        cell = self._cell(**filters)
+        return 0 if cell is None else int(self._counts[cell])
+
+    def quantiles(self, cell, quantiles=(0.1, 0.5, 0.9)):
+        """Approximate quantiles of every measure from a cell's histograms, shape (measures, quantiles)."""
+        cumulative = np.cumsum(self._histograms[cell], axis=1)
+        total = cumulative[:, -1:]
+        result = np.empty((len(MEASURES), len(quantiles)))
+        for j, q in enumerate(quantiles):
+            target = q * total
+            b = np.minimum((cumulative < target).sum(axis=1), BINS - 1)
+            before = np.where(b > 0, np.take_along_axis(cumulative, np.maximum(b - 1, 0)[:, None], axis=1)[:, 0], 0)
+            in_bin = self._histograms[cell][np.arange(len(MEASURES)), b]
+            fraction = np.where(in_bin > 0, (target[:, 0] - before) / np.maximum(in_bin, 1), 0.5)
+            result[:, j] = self._low + (b + fraction) * self._width
+        return result
+
+    def summary(self, country=None, continent=None, age_band=None, sex=None, quantiles=(0.1, 0.5, 0.9)):
+        """Aggregates for one cohort, or None if no rows match.
+
+        Open dimensions are passed as None. Cost does not depend on the
+        number of rows indexed.
+        """
+        cell = self._cell(country, continent, age_band, sex)
+        if cell is None:
+            return None
+        n = int(self._counts[cell])
+        means = self._sums[cell] / n
+        variance = np.maximum(self._squares[cell] / n - means[:len(MEASURES)] ** 2, 0)
+        sketch = self.quantiles(cell, quantiles)
+        return {
+            "count": n,
+            "high_risk": int(self._risk[cell]),
+            "risk_rate": self._risk[cell] / n,
+            "measures": {
+                name: {"mean": means[i], "std": np.sqrt(variance[i]),
+                       **{f"p{round(q * 100)}": sketch[i, j] for j, q in enumerate(quantiles)}}
+                for i, name in enumerate(MEASURES)
+            },
+            "prevalence": {name: means[len(MEASURES) + i] for i, name in enumerate(FLAGS)},
+        }
+
+    def breakdown(self, dimension, **filters):
+        """(value, count, risk rate) for each value of `dimension` within the filtered cohort."""
+        argument = dimension.lower().replace(" ", "_")
+        rows = []
+        for value in sorted(self.values[dimension]):
+            cell = self._cell(**{**filters, argument: value})
+            if cell is not None:
+                rows.append((value, int(self._counts[cell]), self._risk[cell] / self._counts[cell]))
+        return rows
+
+
+def build_index(csv_path=RAW_PATH):
+    from datacache import load_dataset
+
+    return CohortIndex().add(load_dataset(csv_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cohort index and time a few queries.")
+    parser.add_argument("--data", default=RAW_PATH, help="raw or cleaned layout CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_index(args.data)
+    print(f"Indexed {index.rows:,} rows into {len(index):,} cohort cells in {time.perf_counter() - start:.2f} s")
+
+    filters = {"continent": "Europe", "age_band": "60-69", "sex": "Male"}
+    start = time.perf_counter()
+    for _ in range(1000):
+        summary = index.summary(**filters)
+    print(f"summary({filters}) in {(time.perf_counter() - start):.3f} ms per query")
+    print(f"  {summary['count']:,} patients, {summary['risk_rate']:.1%} high risk, "
+          f"median cholesterol {summary['measures']['Cholesterol']['p50']:.0f}")
+    for value, count, rate in index.breakdown("Country", **filters):
+        print(f"  {value:<16} {count:>5,} {rate:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Columnar, compactly typed cache for the heart attack CSVs.
+
+The first load of a CSV parses it and writes each column as a `.npy`
+file: 0/1 flags as int8, other integers in the smallest signed type that
+holds them, continuous measures as float32 and low-cardinality strings as
+categorical codes. Strings with many distinct values (IDs such as Patient
+ID) are stored as a UTF-8 blob plus an offsets array instead, so the cache
+metadata stays small however many rows there are. The CSV is read in
+chunks, twice (once to choose each column's type, once to write it), so
+building never holds the whole file in memory. Later loads memory-map
+those files instead of parsing text, and the cache is rebuilt whenever the
+CSV's size or modification time changes.
+
+    from datacache import load_dataset
+    frame = load_dataset("Cleaned Heart Attack Prediction Dataset.csv")
+
+    python datacache.py "Cleaned Heart Attack Prediction Dataset.csv"   # size and load-time savings
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+CACHE_DIR = ".dataset_cache"
+CACHE_FORMAT = 2
+# Strings with more distinct values than this, or than half the rows, are not categorized
+CATEGORY_LIMIT = 4096
+CHUNK_ROWS = 250_000
+
+
+def cache_path(csv_path, cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(csv_path))[0].replace(" ", "_")
+    return os.path.join(cache_dir, stem)
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _kind(values):
+    if values.dtype.kind in "biu":
+        return "int"
+    return "float" if values.dtype.kind == "f" else "string"
+
+
+class _ColumnStats:
+    """What the first pass learns about a column: its kind, integer range and distinct strings."""
+
+    def __init__(self):
+        self.kind = None
+        self.low = self.high = None
+        # Distinct strings, until there are too many to categorize
+        self.distinct = set()
+        self.overflow = False
+
+    def update(self, series):
+        values = series.to_numpy()
+        kind = _kind(values)
+        # A column with a float or string in any chunk is that kind throughout
+        order = ("int", "float", "string")
+        self.kind = kind if self.kind is None else order[max(order.index(kind), order.index(self.kind))]
+        if kind == "int" and values.size:
+            low, high = int(values.min()), int(values.max())
+            self.low = low if self.low is None else min(self.low, low)
+            self.high = high if self.high is None else max(self.high, high)
+        if not self.overflow:
+            self.distinct.update(series.astype(str).unique().tolist())
+            self.overflow = len(self.distinct) > CATEGORY_LIMIT
+
+    def spec(self, rows):
+        """The column's on-disk spec, given the number of rows."""
+        if self.kind == "int":
+            low, high = (self.low, self.high) if self.low is not None else (0, 0)
+            if low >= 0 and high <= 1:
+                return {"kind": "flag", "dtype": "int8"}
+            dtype = next(t for t in (np.int8, np.int16, np.int32, np.int64)
+                         if np.iinfo(t).min <= low and high <= np.iinfo(t).max)
+            return {"kind": "int", "dtype": np.dtype(dtype).name}
+        if self.kind == "float":
+            return {"kind": "float", "dtype": "float32"}
+        # ID-like columns, with about one value per row, are not worth a category list
+        if self.overflow or len(self.distinct) * 2 > max(rows, 2):
+            return {"kind": "blob"}
+        categories = sorted(self.distinct)
+        code_type = np.int8 if len(categories) < 2**7 else np.int16
+        return {"kind": "category", "dtype": np.dtype(code_type).name, "categories": categories}
+
+
+class _ColumnWriter:
+    """Second pass: writes one column's chunks into its cache files."""
+
+    def __init__(self, directory, spec, rows):
+        self.spec = spec
+        self.row = 0
+        if spec["kind"] == "blob":
+            self._offsets = np.lib.format.open_memmap(os.path.join(directory, spec["offsets"]), mode="w+",
+                                                      dtype=np.int64, shape=(rows + 1,))
+            self._offsets[0] = 0
+            self._bytes = open(os.path.join(directory, spec["file"]), "wb")
+        else:
+            self._array = np.lib.format.open_memmap(os.path.join(directory, spec["file"]), mode="w+",
+                                                    dtype=spec["dtype"], shape=(rows,))
+            if spec["kind"] == "category":
+                self._categories = np.array(spec["categories"])
+
+    def write(self, series):
+        stop = self.row + len(series)
+        kind = self.spec["kind"]
+        if kind == "blob":
+            encoded = [value.encode() for value in series.astype(str)]
+            self._offsets[self.row + 1:stop + 1] = (self._offsets[self.row]
+                                                    + np.cumsum([len(value) for value in encoded]))
+            self._bytes.write(b"".join(encoded))
+        elif kind == "category":
+            self._array[self.row:stop] = np.searchsorted(self._categories, series.astype(str).to_numpy())
+        else:
+            self._array[self.row:stop] = series.to_numpy().astype(self.spec["dtype"])
+        self.row = stop
+
+    def close(self):
+        if self.spec["kind"] == "blob":
+            self._offsets.flush()
+            self._bytes.close()
+        else:
+            self._array.flush()
+
+
+def build_cache(csv_path, cache_dir=CACHE_DIR, chunk_rows=CHUNK_ROWS):
+    """Parse `csv_path` chunk by chunk and write its columnar cache; returns the cache directory."""
+    import pandas as pd
+
+    stats, rows = {}, 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+        for name in chunk.columns:
+            stats.setdefault(name, _ColumnStats()).update(chunk[name])
+        rows += len(chunk)
+
+    directory = cache_path(csv_path, cache_dir)
+    os.makedirs(directory, exist_ok=True)
+    columns, writers = [], []
+    for i, (name, column) in enumerate(stats.items()):
+        spec = column.spec(rows)
+        if spec["kind"] == "blob":
+            spec.update(file=f"{i:03d}.bin", offsets=f"{i:03d}.offsets.npy")
+        else:
+            spec["file"] = f"{i:03d}.npy"
+        spec["name"] = name
+        columns.append(spec)
+        writers.append(_ColumnWriter(directory, spec, rows))
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            for name, writer in zip(stats, writers):
+                writer.write(chunk[name])
+    finally:
+        for writer in writers:
+            writer.close()
+
+    meta = {"format": CACHE_FORMAT, "source": _source_stamp(csv_path), "rows": rows, "columns": columns}
+    # Written last and atomically, so a half-built cache is never treated as valid
+    tmp = os.path.join(directory, "meta.json.tmp")
+    with open(tmp, "w") as file:
+        json.dump(meta, file)
+    os.replace(tmp, os.path.join(directory, "meta.json"))
+    return directory
+
+
+def _read_blob(directory, spec):
+    offsets = np.load(os.path.join(directory, spec["offsets"]), mmap_mode="r")
+    with open(os.path.join(directory, spec["file"]), "rb") as file:
+        data = file.read()
+    return np.array([data[start:stop].decode() for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist())],
+                    dtype=object)
+
+
+def _read_meta(csv_path, cache_dir):
+    try:
+        with open(os.path.join(cache_path(csv_path, cache_dir), "meta.json")) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != CACHE_FORMAT or meta.get("source") != _source_stamp(csv_path):
+        return None
+    return meta
+
+
+def load_dataset(csv_path, columns=None, cache_dir=CACHE_DIR, refresh=False):
+    """Load a CSV as a DataFrame through its columnar cache, building it if needed.
+
+    Numeric columns are read-only memory maps of the cache files; string
+    columns come back as pandas categoricals, or as object arrays for
+    high-cardinality ones. `columns` restricts the load
+    to a subset, which then touches only those files.
+    """
+    import pandas as pd
+
+    meta = None if refresh else _read_meta(csv_path, cache_dir)
+    if meta is None:
+        build_cache(csv_path, cache_dir)
+        meta = _read_meta(csv_path, cache_dir)
+    directory = cache_path(csv_path, cache_dir)
+    wanted = None if columns is None else set(columns)
+    data = {}
+    for spec in meta["columns"]:
+        if wanted is not None and spec["name"] not in wanted:
+            continue
+        if spec["kind"] == "blob":
+            data[spec["name"]] = _read_blob(directory, spec)
+            continue
+        array = np.load(os.path.join(directory, spec["file"]), mmap_mode="r")
+        if spec["kind"] == "category":
+            array = pd.Categorical.from_codes(array, categories=spec["categories"])
+        data[spec["name"]] = array
+    return pd.DataFrame(data, copy=False)
+
+
+def _cache_bytes(csv_path, cache_dir):
+    directory = cache_path(csv_path, cache_dir)
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def report(csv_path, cache_dir=CACHE_DIR, repeat=5):
+    """Compare parsing the CSV with loading its cache: bytes on disk, load time, in-memory size."""
+    import pandas as pd
+
+    load_dataset(csv_path, cache_dir=cache_dir)
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    parse_seconds, parsed = best(lambda: pd.read_csv(csv_path))
+    load_seconds, cached = best(lambda: load_dataset(csv_path, cache_dir=cache_dir))
+    return {
+        "csv_bytes": os.path.getsize(csv_path),
+        "cache_bytes": _cache_bytes(csv_path, cache_dir),
+        "parse_ms": parse_seconds * 1e3,
+        "cache_load_ms": load_seconds * 1e3,
+        "parsed_memory_bytes": int(parsed.memory_usage(deep=True).sum()),
+        "cached_memory_bytes": int(cached.memory_usage(deep=True).sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build columnar caches for dataset CSVs and report the savings.")
+    parser.add_argument("csv", nargs="+")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--refresh", action="store_true", help="rebuild even if the cache is current")
+    args = parser.parse_args()
+
+    for csv_path in args.csv:
+        if args.refresh:
+            build_cache(csv_path, args.cache_dir)
+        r = report(csv_path, args.cache_dir)
+        print(csv_path)
+        print(f"  on disk:   {r['csv_bytes'] / 2**20:8.2f} MB CSV    -> {r['cache_bytes'] / 2**20:8.2f} MB cache")
+        print(f"  load time: {r['parse_ms']:8.1f} ms parse  -> {r['cache_load_ms']:8.1f} ms mmap")
+        print(f"  in memory: {r['parsed_memory_bytes'] / 2**20:8.2f} MB parsed -> "
+              f"{r['cached_memory_bytes'] / 2**20:8.2f} MB cached")
+
+
+if __name__ == "__main__":
+    main()
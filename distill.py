@@ -0,0 +1,236 @@
+"""Distilled fast tier for triage screening.
+
+A sparse (L1) logistic student is trained on the current model's
+predict_proba outputs over the cleaned dataset. Each row enters twice, as
+high risk with weight p and as low risk with weight 1 - p, so the student
+fits the teacher's probabilities rather than its hard labels. Scoring the
+student is one dot product per row.
+
+The tiered scorer serves the student and sends the rows it is unsure
+about, those with a probability inside the escalation band, to the full
+model. The band is picked automatically on held-out rows: the narrowest
+band whose tiered predictions agree with the full model on at least
+--target-agreement of them. The fast artifact is written only when that
+band escalates few enough rows for the tier to be clearly faster than the
+full model (MIN_SPEEDUP).
+
+    python distill.py                       # report, and write models/heart_model_fast.bin if worthwhile
+    python distill.py --target-agreement 0.95 --output-report report.json
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from features import model_matrix
+from metrics import METRICS
+from scoring import FAST_ARTIFACT_PATH, MODELS_DIR
+
+CLEANED_PATH = "Cleaned Heart Attack Prediction Dataset.csv"
+REPORT_PATH = os.path.join(MODELS_DIR, "distill_report.json")
+# Candidate half-widths of the escalation band around p = 0.5
+HALF_WIDTHS = np.round(np.arange(0.0, 0.51, 0.025), 3)
+# The tier must beat the full model's per-row cost by this factor to be written
+MIN_SPEEDUP = 1.25
+
+
+class TieredModel:
+    """Serve a fast model, escalating rows with a borderline probability to the full model.
+
+    heart_tier_rows_total counts only the rows scored with record=True, which
+    scoring.predict_risk passes for served predictions, so pre-warm,
+    what-if grids and explanations do not skew the escalation rate.
+    """
+
+    tiered = True
+
+    def __init__(self, fast, full, low, high):
+        self.fast = fast
+        self.full = full
+        self.low = low
+        self.high = high
+        self.classes_ = full.classes_
+        self.model_version = f"{getattr(full, 'model_version', None)}+{getattr(fast, 'model_version', None)}"
+
+    def predict_proba(self, X, record=False):
+        X = np.asarray(X, dtype=np.float64)
+        proba = self.fast.predict_proba(X)
+        escalate = (proba[:, 1] > self.low) & (proba[:, 1] < self.high)
+        escalated = int(escalate.sum())
+        if escalated:
+            proba[escalate] = self.full.predict_proba(X[escalate])
+        if record:
+            METRICS.inc("heart_tier_rows_total", len(X) - escalated, tier="fast")
+            if escalated:
+                METRICS.inc("heart_tier_rows_total", escalated, tier="full")
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def load_tiered(full, path=FAST_ARTIFACT_PATH):
+    """Put the fast tier at `path` in front of `full`, or return `full` if it was distilled from another model."""
+    from artifact import load_engine
+
+    student = load_engine(path)
+    metadata = getattr(student, "metadata", {})
+    if metadata.get("teacher_version") != getattr(full, "model_version", None):
+        return full
+    low, high = metadata["escalate"]
+    return TieredModel(student, full, low, high)
+
+
+def train_student(X, teacher_probability, C=1.0):
+    from sklearn.linear_model import LogisticRegression
+
+    n = len(X)
+    student = LogisticRegression(C=C, l1_ratio=1.0, solver="saga", max_iter=2000)
+    student.fit(np.vstack([X, X]), np.r_[np.ones(n, dtype=int), np.zeros(n, dtype=int)],
+                sample_weight=np.r_[teacher_probability, 1 - teacher_probability])
+    return student
+
+
+def _latency_ms(model, X, rows=500):
+    model.predict_proba(X[:1])
+    samples = []
+    for x in X[:rows]:
+        start = time.perf_counter()
+        model.predict_proba(x[None, :])
+        samples.append(time.perf_counter() - start)
+    return np.percentile(samples, 50) * 1e3, np.percentile(samples, 99) * 1e3
+
+
+def _rows_per_second(model, X, min_seconds=0.5):
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        model.predict_proba(X)
+        calls += 1
+    return calls * len(X) / (time.perf_counter() - start)
+
+
+def _peak_mb(model, X):
+    tracemalloc.start()
+    try:
+        model.predict_proba(X)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def profile(model, X, size_bytes):
+    p50, p99 = _latency_ms(model, X)
+    return {
+        "single_p50_ms": p50,
+        "single_p99_ms": p99,
+        "batch_rows_per_s": _rows_per_second(model, X),
+        "batch_peak_mb": _peak_mb(model, X),
+        "model_bytes": size_bytes,
+    }
+
+
+def tradeoffs(student_probability, teacher_label, full_ms, fast_ms):
+    """Agreement with the full model and expected per-row cost for each escalation band."""
+    rows = []
+    for half in HALF_WIDTHS:
+        escalate = np.abs(student_probability - 0.5) < half
+        tiered = np.where(escalate, teacher_label, student_probability >= 0.5)
+        rows.append({
+            "escalate": [float(0.5 - half), float(0.5 + half)],
+            "escalation_rate": float(escalate.mean()),
+            "agreement": float((tiered == teacher_label).mean()),
+            "expected_ms_per_row": fast_ms + escalate.mean() * full_ms,
+        })
+    return rows
+
+
+def distill(full, X, C=1.0, target_agreement=0.99, holdout=0.2, seed=0):
+    """Train the student, benchmark both tiers and pick the escalation band; returns (student, report)."""
+    from engine import LinearEngine
+
+    teacher_probability = full.predict_proba(X)[:, 1]
+    teacher_label = teacher_probability >= 0.5
+    order = np.random.default_rng(seed).permutation(len(X))
+    test, train = order[:int(len(X) * holdout)], order[int(len(X) * holdout):]
+
+    student = train_student(X[train], teacher_probability[train], C)
+    fast = LinearEngine.from_model(student)
+    student_probability = fast.predict_proba(X[test])[:, 1]
+
+    batch = X[np.random.default_rng(seed).integers(0, len(X), 10_000)]
+    full_bytes = sum(a.nbytes for a in vars(full).values() if isinstance(a, np.ndarray))
+    report = {
+        "teacher_version": getattr(full, "model_version", None),
+        "holdout_rows": int(len(test)),
+        "student": {"C": C, "nonzero_coefficients": int(np.count_nonzero(student.coef_))},
+        "full": profile(full, batch, full_bytes),
+        "fast": profile(fast, batch, fast.coef.nbytes + 8),
+        "student_agreement": float(((student_probability >= 0.5) == teacher_label[test]).mean()),
+        "student_mean_abs_error": float(np.abs(student_probability - teacher_probability[test]).mean()),
+    }
+    # Per-row cost from batch throughput, where the escalated rows are scored as one sub-batch
+    full_ms = 1e3 / report["full"]["batch_rows_per_s"]
+    fast_ms = 1e3 / report["fast"]["batch_rows_per_s"]
+    report["tradeoffs"] = tradeoffs(student_probability, teacher_label[test], full_ms, fast_ms)
+    chosen = next(row for row in report["tradeoffs"] if row["agreement"] >= target_agreement
+                  or row is report["tradeoffs"][-1])
+    report["target_agreement"] = target_agreement
+    report["chosen"] = chosen
+    report["worthwhile"] = bool(chosen["expected_ms_per_row"] * MIN_SPEEDUP <= full_ms)
+    return student, report
+
+
+def main():
+    import pandas as pd
+
+    from artifact import export_model
+    from scoring import load_scorer
+
+    parser = argparse.ArgumentParser(description="Distill a fast tier from the current model and report the trade-off.")
+    parser.add_argument("--data", default=CLEANED_PATH)
+    parser.add_argument("--C", type=float, default=1.0, help="inverse L1 strength of the student")
+    parser.add_argument("--target-agreement", type=float, default=0.99)
+    parser.add_argument("--output", default=FAST_ARTIFACT_PATH)
+    parser.add_argument("--output-report", default=REPORT_PATH)
+    parser.add_argument("--force", action="store_true", help="write the fast tier even if it is not faster")
+    args = parser.parse_args()
+
+    full = load_scorer(tier="full")
+    student, report = distill(full, model_matrix(pd.read_csv(args.data)), args.C, args.target_agreement)
+
+    print(f"{'':<18} {'p50 ms':>8} {'p99 ms':>8} {'rows/s':>12} {'peak MB':>8} {'model KB':>9}")
+    for tier in ("full", "fast"):
+        r = report[tier]
+        print(f"{tier:<18} {r['single_p50_ms']:>8.3f} {r['single_p99_ms']:>8.3f} {r['batch_rows_per_s']:>12,.0f} "
+              f"{r['batch_peak_mb']:>8.2f} {r['model_bytes'] / 1024:>9.1f}")
+    print(f"\nstudent alone agrees with the full model on {report['student_agreement']:.1%} of held-out rows "
+          f"({report['student']['nonzero_coefficients']} nonzero coefficients)")
+    print(f"\n{'escalation band':<18} {'escalated':>10} {'agreement':>10} {'ms/row':>8}")
+    for row in report["tradeoffs"]:
+        low, high = row["escalate"]
+        print(f"{low:.3f} - {high:.3f}     {row['escalation_rate']:>10.1%} {row['agreement']:>10.1%} "
+              f"{row['expected_ms_per_row']:>8.4f}")
+
+    chosen = report["chosen"]
+    print(f"\nband for {args.target_agreement:.0%} agreement: {chosen['escalate'][0]:.3f} - {chosen['escalate'][1]:.3f}, "
+          f"escalating {chosen['escalation_rate']:.1%} of rows")
+    for path in (args.output_report, args.output):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(args.output_report, "w") as file:
+        json.dump(report, file, indent=2)
+    if report["worthwhile"] or args.force:
+        export_model(student, args.output,
+                     metadata={"teacher_version": report["teacher_version"], "escalate": chosen["escalate"]})
+        print(f"wrote {args.output}; the apps now serve it in front of the full model")
+    else:
+        print(f"the tier is not {MIN_SPEEDUP}x faster than the full model at this agreement; no fast tier written")
+        if os.path.exists(args.output):
+            os.remove(args.output)
+
+
+if __name__ == "__main__":
+    main()
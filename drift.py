@@ -0,0 +1,251 @@
+"""Input drift monitoring against the training distribution.
+
+The reference profile (drift_reference.json) holds, for every input column
+of the cleaned dataset, fixed bin edges and the training rows' count per
+bin: numeric columns are cut at their reference quantiles and categories
+get one bin per known value plus one for anything else. `DriftMonitor`
+counts the scored patients into the same bins, so its memory is one small
+array however much traffic it sees, and recording a patient is a bisect
+and an increment per column.
+
+Drift is scored per column with the population stability index (PSI) and,
+for numeric columns, the Kolmogorov-Smirnov distance between the binned
+distributions.
+
+    python drift.py reference                      # rebuild drift_reference.json
+    python drift.py check new_patients.csv         # score a CSV against the reference
+"""
+import argparse
+import bisect
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from features import CATEGORIES, CATEGORY_CODES, SCHEMA, encode
+
+CLEANED_PATH = "Cleaned Heart Attack Prediction Dataset.csv"
+REFERENCE_PATH = "drift_reference.json"
+# Quantile cuts per numeric column; integer columns with fewer values get fewer bins
+BINS = 20
+# Proportions are floored at this before taking logs, so empty bins stay finite
+EPSILON = 1e-4
+# PSI bands in common use: below 0.1 stable, above 0.25 a significant shift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+def build_reference(frame, bins=BINS, source=None):
+    """Reference profile of a cleaned-layout frame, as written to drift_reference.json."""
+    columns = {}
+    for column, (kind, _, _) in SCHEMA.items():
+        if kind == "category":
+            known = CATEGORY_CODES[column]
+            codes = np.array([known.get(value, len(known)) for value in frame[column]])
+            columns[column] = {"kind": "category", "values": CATEGORIES[column],
+                               "counts": np.bincount(codes, minlength=len(known) + 1).tolist()}
+        else:
+            values = np.asarray(frame[column], dtype=np.float64)
+            values = values[np.isfinite(values)]
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1], method="lower"))
+            columns[column] = {"kind": "numeric", "edges": edges.tolist(),
+                               "counts": np.bincount(np.searchsorted(edges, values, side="right"),
+                                                     minlength=len(edges) + 1).tolist()}
+    return {"source": source, "rows": len(frame), "columns": columns}
+
+
+def load_reference(path=REFERENCE_PATH):
+    with open(path) as file:
+        return json.load(file)
+
+
+def psi(expected, actual):
+    """Population stability index between two binned distributions (counts or proportions)."""
+    p = np.maximum(np.asarray(expected, dtype=np.float64) / np.sum(expected), EPSILON)
+    q = np.maximum(np.asarray(actual, dtype=np.float64) / np.sum(actual), EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(expected, actual):
+    """Largest gap between the cumulative distributions of two binned samples."""
+    p = np.cumsum(expected) / np.sum(expected)
+    q = np.cumsum(actual) / np.sum(actual)
+    return float(np.max(np.abs(q - p)))
+
+
+def status(score):
+    if score is None:
+        return "no data"
+    return "significant" if score >= PSI_SIGNIFICANT else "moderate" if score >= PSI_MODERATE else "stable"
+
+
+class DriftMonitor:
+    """Binned counts of the scored inputs, compared against a reference profile.
+
+    Thread-safe and shared per process, like the prediction cache.
+    `observe` takes anything indexable by column name (a DataFrame, a dict
+    of arrays, or a one-patient dict of lists); columns it lacks are
+    skipped, so the service, which only receives the model's inputs,
+    monitors just those.
+    """
+
+    def __init__(self, reference):
+        self.reference = reference
+        self.columns = list(reference["columns"])
+        specs = [reference["columns"][column] for column in self.columns]
+        self._numeric = [spec["kind"] == "numeric" for spec in specs]
+        self._edges = [spec.get("edges") for spec in specs]
+        self._edge_arrays = [np.asarray(edges) if edges is not None else None for edges in self._edges]
+        self._codes = [CATEGORY_CODES.get(column) for column in self.columns]
+        self._expected = [np.asarray(spec["counts"], dtype=np.float64) for spec in specs]
+        self._counts = np.zeros((len(specs), max(len(spec["counts"]) for spec in specs)), dtype=np.int64)
+        self._rows = np.zeros(len(specs), dtype=np.int64)
+        self._lock = threading.Lock()
+        self.since = time.time()
+
+    def _bins(self, j, values, single):
+        column = self.columns[j]
+        if self._numeric[j]:
+            if single:
+                return bisect.bisect_right(self._edges[j], float(values))
+            return np.searchsorted(self._edge_arrays[j], np.asarray(values, dtype=np.float64), side="right")
+        if single:
+            return self._category_bin(j, values)
+        try:
+            return encode(column, values).astype(np.intp)
+        except ValueError:
+            return np.array([self._category_bin(j, value) for value in np.asarray(values).ravel()])
+
+    def _category_bin(self, j, value):
+        """Bin of one category value, named or already a code as encode() accepts; unknown values go to "other"."""
+        codes = self._codes[j]
+        if isinstance(value, (str, np.str_)):
+            return codes.get(str(value), len(codes))
+        if (isinstance(value, (int, float, np.number, np.bool_)) and np.isfinite(value) and value == int(value)
+                and 0 <= value < len(codes)):
+            return int(value)
+        return len(codes)
+
+    def observe(self, frame):
+        """Count one patient or a batch into the sketch."""
+        present = [j for j, column in enumerate(self.columns) if column in frame]
+        if not present:
+            return
+        first = frame[self.columns[present[0]]]
+        if np.ndim(first) == 0 or len(first) == 1:
+            # One patient: a bisect or dict lookup per column and one scatter update
+            bins = []
+            for j in present:
+                value = frame[self.columns[j]]
+                if isinstance(value, list):
+                    value = value[0]
+                elif np.ndim(value):
+                    value = np.asarray(value).ravel()[0]
+                bins.append(self._bins(j, value, True))
+            with self._lock:
+                self._counts[present, bins] += 1
+                self._rows[present] += 1
+            return
+        counts = [np.bincount(self._bins(j, frame[self.columns[j]], False), minlength=self._counts.shape[1])
+                  for j in present]
+        with self._lock:
+            self._counts[present] += counts
+            self._rows[present] += len(first)
+
+    def reset(self):
+        with self._lock:
+            self._counts[:] = 0
+            self._rows[:] = 0
+            self.since = time.time()
+
+    def distribution(self, column):
+        """(bin labels, reference proportions, observed proportions) of one column."""
+        j = self.columns.index(column)
+        expected = self._expected[j]
+        with self._lock:
+            actual = self._counts[j, :len(expected)].astype(np.float64)
+        if self._numeric[j]:
+            edges = self._edges[j]
+            labels = ([f"< {edges[0]:g}"] + [f"{low:g} – {high:g}" for low, high in zip(edges, edges[1:])]
+                      + [f"≥ {edges[-1]:g}"])
+        else:
+            labels = list(self.reference["columns"][column]["values"]) + ["other"]
+        return labels, expected / expected.sum(), actual / max(actual.sum(), 1)
+
+    def report(self):
+        """Drift scores of every column, JSON-serializable."""
+        with self._lock:
+            counts, rows = self._counts.copy(), self._rows.copy()
+        columns = []
+        for j, column in enumerate(self.columns):
+            expected = self._expected[j]
+            actual = counts[j, :len(expected)]
+            observed = int(rows[j])
+            score = psi(expected, actual) if observed else None
+            columns.append({
+                "column": column,
+                "kind": "numeric" if self._numeric[j] else "category",
+                "rows": observed,
+                "psi": score,
+                "ks": ks(expected, actual) if observed and self._numeric[j] else None,
+                "status": status(score),
+            })
+        return {
+            "reference": self.reference.get("source"),
+            "reference_rows": self.reference["rows"],
+            "since": self.since,
+            "rows": int(rows.max()) if len(rows) else 0,
+            "columns": columns,
+        }
+
+
+def load_monitor(path=REFERENCE_PATH):
+    """A monitor on the reference profile at `path`, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    return DriftMonitor(load_reference(path))
+
+
+def main():
+    import pandas as pd
+
+    from pipeline import clean, is_raw
+
+    parser = argparse.ArgumentParser(description="Build the drift reference profile or score a CSV against it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("reference", help="profile the training data")
+    build.add_argument("--data", default=CLEANED_PATH)
+    build.add_argument("--bins", type=int, default=BINS)
+    build.add_argument("--output", default=REFERENCE_PATH)
+    check = commands.add_parser("check", help="drift of a cleaned- or raw-layout CSV")
+    check.add_argument("csv")
+    check.add_argument("--reference", default=REFERENCE_PATH)
+    check.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "reference":
+        reference = build_reference(pd.read_csv(args.data), args.bins, source=os.path.basename(args.data))
+        with open(args.output, "w") as file:
+            json.dump(reference, file, indent=1)
+        print(f"Profiled {reference['rows']:,} rows into {args.output}")
+        return
+
+    monitor = DriftMonitor(load_reference(args.reference))
+    for chunk in pd.read_csv(args.csv, chunksize=50_000):
+        monitor.observe(clean(chunk) if is_raw(chunk) else chunk)
+    report = monitor.report()
+    print(f"{report['rows']:,} rows against {report['reference_rows']:,} reference rows ({report['reference']})")
+    print(f"{'column':<34} {'psi':>8} {'ks':>7}  status")
+    for row in sorted(report["columns"], key=lambda row: -(row["psi"] or 0)):
+        ks_text = f"{row['ks']:.3f}" if row["ks"] is not None else "-"
+        psi_text = f"{row['psi']:.4f}" if row["psi"] is not None else "-"
+        print(f"{row['column']:<34} {psi_text:>8} {ks_text:>7}  {row['status']}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Array-based inference engine for the nearest-neighbour model.
+
+`heart_model.pkl` is a distance-weighted k-nearest-neighbour classifier, so
+the fitted model is a reference matrix plus labels rather than tree nodes.
+The engine keeps those as contiguous arrays with precomputed squared norms
+and scores a whole batch at once: one matrix product gives the squared
+distances to the candidate reference rows, `argpartition` picks the k
+nearest, and the exact distances of those k are recomputed before the
+weighted vote. Candidates are narrowed exactly by grouping reference rows
+on the model's 0/1 features (see KNNEngine). Scoring skips scikit-learn's
+per-call validation and dispatch, which dominates small batches.
+`LinearEngine` does the same for the logistic models from train.py,
+online.py and distill.py.
+
+Compare against the scikit-learn path with
+
+    python engine.py --sizes 1 100 10000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+# Query rows per matrix product; keeps the distance block cache-resident
+CHUNK_ROWS = 64
+
+
+def _pattern_keys(X, binary):
+    return (X[:, binary] == 1).astype(np.intp) @ (1 << np.arange(len(binary)))
+
+
+def grouped_index(fit_X, y):
+    """The reference rows in the grouped layout KNNEngine searches, as a dict of arrays.
+
+    Reference rows are grouped by their 0/1 feature pattern. Each
+    mismatched 0/1 feature adds exactly 1 to the squared distance, so a
+    query whose k-th neighbour within its own group is closer than 1
+    cannot have a nearer row in any other group. artifact.py stores these
+    arrays at export, so a mapped engine builds nothing on load.
+    """
+    fit_X = np.asarray(fit_X, dtype=np.float64)
+    binary = np.flatnonzero(np.all((fit_X == 0) | (fit_X == 1), axis=0))[:16]
+    keys = _pattern_keys(fit_X, binary)
+    order = np.argsort(keys, kind="stable")
+    grouped = np.ascontiguousarray(fit_X[order])
+    return {
+        "binary": binary,
+        "order": order,
+        "offsets": np.searchsorted(keys[order], np.arange(2 ** len(binary) + 1)),
+        "fit_X": grouped,
+        "y": np.asarray(y, dtype=np.intp)[order],
+        "fit_T": np.ascontiguousarray(grouped.T),
+        "fit_sq": np.einsum("ij,ij->i", grouped, grouped),
+    }
+
+
+class KNNEngine:
+    def __init__(self, fit_X, y, classes, n_neighbors, weights="uniform", model_version=None, index=None):
+        """`index` is a precomputed grouped_index(fit_X, y), used as is (e.g. memory-mapped)."""
+        if weights not in ("uniform", "distance"):
+            raise ValueError(f"unsupported weights {weights!r}")
+        self.classes_ = np.asarray(classes)
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.model_version = model_version
+
+        index = grouped_index(fit_X, y) if index is None else index
+        self._binary = index["binary"]
+        self._order = index["order"]
+        self._offsets = index["offsets"]
+        self.fit_X = index["fit_X"]
+        self.y = index["y"]
+        self._fit_T = index["fit_T"]
+        self._fit_sq = index["fit_sq"]
+
+    @classmethod
+    def from_model(cls, model):
+        """Build an engine from a fitted KNeighborsClassifier (pickled or mapped)."""
+        if model.effective_metric_ != "euclidean":
+            raise ValueError(f"unsupported metric {model.effective_metric_!r}")
+        return cls(model._fit_X, model._y, model.classes_, model.n_neighbors, model.weights,
+                   getattr(model, "model_version", None))
+
+    def _keys(self, X):
+        return _pattern_keys(X, self._binary)
+
+    def _search(self, X, lo, hi):
+        """k nearest rows of self.fit_X[lo:hi] for each row of X, nearest first."""
+        k = self.n_neighbors
+        distances = np.empty((len(X), k))
+        indices = np.empty((len(X), k), dtype=np.intp)
+        fit_T, fit_sq = self._fit_T[:, lo:hi], self._fit_sq[lo:hi]
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            # |x - r|^2 = |r|^2 - 2 x.r + |x|^2; |x|^2 does not change the ranking
+            scores = chunk @ fit_T
+            scores *= -2
+            scores += fit_sq
+            nearest = np.argpartition(scores, k - 1, axis=1)[:, :k] + lo
+            # Exact distances for the selected neighbours avoid the cancellation
+            # error of the expanded form, so exact matches come out as zero
+            diff = chunk[:, None, :] - self.fit_X[nearest]
+            exact = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+            order = np.argsort(exact, axis=1, kind="stable")
+            distances[start:start + len(chunk)] = np.take_along_axis(exact, order, axis=1)
+            indices[start:start + len(chunk)] = np.take_along_axis(nearest, order, axis=1)
+        return distances, indices
+
+    def _kneighbors(self, X):
+        # Indices here refer to the engine's grouped row order
+        distances = np.empty((len(X), self.n_neighbors))
+        indices = np.empty((len(X), self.n_neighbors), dtype=np.intp)
+        keys = self._keys(X)
+        exhaustive = ~np.all((X[:, self._binary] == 0) | (X[:, self._binary] == 1), axis=1)
+        for key in np.unique(keys[~exhaustive]):
+            rows = np.flatnonzero((keys == key) & ~exhaustive)
+            lo, hi = self._offsets[key], self._offsets[key + 1]
+            if hi - lo < self.n_neighbors:
+                exhaustive[rows] = True
+                continue
+            group_distances, group_indices = self._search(X[rows], lo, hi)
+            distances[rows], indices[rows] = group_distances, group_indices
+            exhaustive[rows[group_distances[:, -1] >= 1]] = True
+        rows = np.flatnonzero(exhaustive)
+        if len(rows):
+            distances[rows], indices[rows] = self._search(X[rows], 0, len(self.fit_X))
+        return distances, indices
+
+    def kneighbors(self, X):
+        """Return (distances, indices) of the k nearest reference rows, nearest first."""
+        distances, indices = self._kneighbors(np.asarray(X, dtype=np.float64))
+        return distances, self._order[indices]
+
+    def predict_proba(self, X):
+        distances, indices = self._kneighbors(np.asarray(X, dtype=np.float64))
+        if self.weights == "uniform":
+            weights = np.ones_like(distances)
+        else:
+            # Same rule as scikit-learn: an exact match takes all the weight
+            exact = distances == 0
+            with np.errstate(divide="ignore"):
+                weights = np.where(exact.any(axis=1, keepdims=True), exact, 1 / distances)
+        labels = self.y[indices]
+        proba = np.empty((len(distances), len(self.classes_)))
+        for c in range(len(self.classes_)):
+            proba[:, c] = np.where(labels == c, weights, 0).sum(axis=1)
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class LinearEngine:
+    """Logistic-loss linear model as one matrix-vector product and a sigmoid."""
+
+    def __init__(self, coef, intercept, classes, model_version=None):
+        self.coef = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).ravel())
+        self.intercept = float(np.asarray(intercept).ravel()[0])
+        self.classes_ = np.asarray(classes)
+        self.model_version = model_version
+
+    @classmethod
+    def from_model(cls, model):
+        """Build an engine from a fitted binary LogisticRegression or log-loss SGDClassifier."""
+        if len(model.classes_) != 2 or getattr(model, "loss", "log_loss") != "log_loss":
+            raise ValueError("only binary logistic-loss models are supported")
+        return cls(model.coef_, model.intercept_, model.classes_, getattr(model, "model_version", None))
+
+    def predict_proba(self, X):
+        z = np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+        proba = np.empty((len(z), 2))
+        proba[:, 1] = 1 / (1 + np.exp(-z))
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def _rows_per_second(predict_proba, X, min_seconds=0.5):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        predict_proba(X)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls * len(X) / elapsed
+
+
+def compare(model, X, sizes):
+    """Check agreement with scikit-learn and report rows/sec per batch size."""
+    engine = KNNEngine.from_model(model)
+    check = X[:min(len(X), 10_000)]
+    difference = np.abs(engine.predict_proba(check) - model.predict_proba(check)).max()
+    print(f"max |engine - scikit-learn| probability difference: {difference:.2e}")
+
+    rng = np.random.default_rng(0)
+    print(f"{'batch':>10} {'scikit-learn rows/s':>20} {'engine rows/s':>15} {'speed-up':>9}")
+    for size in sizes:
+        batch = X[rng.integers(0, len(X), size)]
+        sklearn_rate = _rows_per_second(model.predict_proba, batch)
+        engine_rate = _rows_per_second(engine.predict_proba, batch)
+        print(f"{size:>10,} {sklearn_rate:>20,.0f} {engine_rate:>15,.0f} {engine_rate / sklearn_rate:>8.1f}x")
+
+
+def main():
+    import pandas as pd
+
+    from features import model_matrix
+    from scoring import load_model
+
+    parser = argparse.ArgumentParser(description="Benchmark the array engine against scikit-learn.")
+    parser.add_argument("--model", help="model file (defaults to the artifact, then the pickle)")
+    parser.add_argument("--data", default="Cleaned Heart Attack Prediction Dataset.csv")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000, 1_000_000])
+    args = parser.parse_args()
+
+    compare(load_model(args.model), model_matrix(pd.read_csv(args.data)), args.sizes)
+
+
+if __name__ == "__main__":
+    main()
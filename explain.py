@@ -0,0 +1,137 @@
+"""Per-prediction feature attribution.
+
+Contributions are exact Shapley values of the high-risk probability over
+the model's features, measured against a baseline patient (the median of
+the model's reference rows, or of the dataset for models without them).
+For a patient x and a coalition S of features, v(S) is the model's score
+for x with the features outside S reset to the baseline, and a feature's
+contribution is its weighted average marginal effect over all coalitions. Contributions add up
+exactly: base_value + contributions.sum() == the patient's score.
+
+`heart_model.pkl` is a nearest-neighbour model, so there are no tree paths
+to walk. With 10 features every coalition can be scored directly instead:
+the coalition rows of a whole batch go through the model together, and a
+feature equal to the baseline is a null player whose contribution is 0, so
+only the coalitions of the remaining features are scored.
+
+    python explain.py --output contributions.csv     # explain the cleaned dataset
+"""
+import argparse
+import time
+from math import factorial
+
+import numpy as np
+
+from cache import PredictionCache, model_version, vector_key
+from features import FEATURE_NAMES, INPUT_COLUMNS, model_matrix
+
+CLEANED_PATH = "Cleaned Heart Attack Prediction Dataset.csv"
+
+# Coalition rows per model call; bounds memory for large batches
+CHUNK_ROWS = 200_000
+
+
+def _reference_rows(model):
+    for name in ("fit_X", "_fit_X"):
+        if hasattr(model, name):
+            return np.asarray(getattr(model, name))
+    # Models without stored training rows are explained against the dataset
+    from datacache import load_dataset
+
+    return model_matrix(load_dataset(CLEANED_PATH, columns=INPUT_COLUMNS))
+
+
+def _coalition_weights(d):
+    """(2^d, d) matrix W with phi = v @ W for the values v of all 2^d coalitions."""
+    bits = (np.arange(2 ** d)[:, None] >> np.arange(d)) & 1
+    size = bits.sum(axis=1)
+    weight = np.array([factorial(k) * factorial(d - k - 1) / factorial(d) for k in range(d)] + [0.0])
+    # Coalition S adds v(S) * w(|S| - 1) for each i in S and subtracts v(S) * w(|S|) for each i not in S
+    return np.where(bits == 1, weight[np.maximum(size - 1, 0)][:, None], -weight[size][:, None]), bits == 1
+
+
+class Explainer:
+    def __init__(self, model, background=None, cache_size=4096):
+        self.model = model
+        background = _reference_rows(model) if background is None else np.asarray(background)
+        self.baseline = np.median(np.asarray(background, dtype=np.float64), axis=0)
+        self.base_value = float(self._score(self.baseline[None, :])[0])
+        self.cache = PredictionCache(cache_size)
+        self._version = model_version(model) + "/shapley"
+
+    def _score(self, X):
+        return self.model.predict_proba(X)[:, 1]
+
+    def _explain(self, X):
+        contributions = np.zeros(X.shape)
+        active = ~np.isclose(X, self.baseline, rtol=0, atol=1e-9)
+        masks = active @ (1 << np.arange(X.shape[1]))
+        # Patients with the same active features share one coalition layout
+        for mask in np.unique(masks):
+            rows = np.flatnonzero(masks == mask)
+            features = np.flatnonzero(active[rows[0]])
+            if not len(features):
+                continue
+            weights, bits = _coalition_weights(len(features))
+            per_chunk = max(1, CHUNK_ROWS // len(bits))
+            for start in range(0, len(rows), per_chunk):
+                chunk = rows[start:start + per_chunk]
+                coalitions = np.repeat(X[chunk, None, :], len(bits), axis=1)
+                coalitions[:, :, features] = np.where(bits, X[chunk, None][:, :, features], self.baseline[features])
+                values = self._score(coalitions.reshape(-1, X.shape[1])).reshape(len(chunk), len(bits))
+                contributions[chunk[:, None], features] = values @ weights
+        return contributions
+
+    def explain(self, X):
+        """Contributions of each feature to each row's high-risk probability.
+
+        Returns an (n_rows, n_features) array in model feature order. Rows
+        explained before by this explainer are answered from its cache; the
+        rest are explained together.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        keys = [vector_key(self._version, x) for x in X]
+        contributions = np.empty(X.shape)
+        missing = []
+        for i, key in enumerate(keys):
+            value = self.cache.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                contributions[i] = value
+        if missing:
+            # Duplicate rows in the batch are explained once
+            unique, inverse = np.unique(X[missing], axis=0, return_inverse=True)
+            explained = self._explain(unique)
+            contributions[missing] = explained[inverse.ravel()]
+            for i, row in zip(missing, contributions[missing]):
+                self.cache.put(keys[i], row.copy())
+        return contributions
+
+
+def main():
+    import pandas as pd
+
+    from scoring import load_scorer
+
+    parser = argparse.ArgumentParser(description="Explain the model's predictions for a cleaned-layout CSV.")
+    parser.add_argument("--model", help="model file (defaults to the artifact, then the pickle)")
+    parser.add_argument("--data", default=CLEANED_PATH)
+    parser.add_argument("--output", help="write per-row contributions here")
+    args = parser.parse_args()
+
+    explainer = Explainer(load_scorer(args.model))
+    X = model_matrix(pd.read_csv(args.data))
+    start = time.perf_counter()
+    contributions = explainer.explain(X)
+    elapsed = time.perf_counter() - start
+    print(f"Explained {len(X):,} rows in {elapsed:.2f} s ({len(X) / elapsed:,.0f} rows/s)")
+    print(f"base value {explainer.base_value:.3f}; mean |contribution| per feature:")
+    for name, value in sorted(zip(FEATURE_NAMES, np.abs(contributions).mean(axis=0)), key=lambda item: -item[1]):
+        print(f"  {name:<26} {value:.4f}")
+    if args.output:
+        pd.DataFrame(contributions, columns=FEATURE_NAMES).to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
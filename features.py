@@ -0,0 +1,187 @@
+"""Feature schema and the vectorizer that maps patients onto the model input.
+
+`SCHEMA` lists every input column of the cleaned dataset with its kind and
+valid range, and `CATEGORIES` the allowed values of the string columns;
+the apps build their form widgets from them. `model_matrix` and
+`Vectorizer.transform` validate a frame against the schema and write the
+scaled model matrix column by column through one code path, for one row or
+many. A `Vectorizer` reuses one preallocated buffer across calls.
+"""
+import numpy as np
+
+# Column -> (kind, low, high). Kinds: "int", "float", "flag" (0/1) and
+# "category" (values in CATEGORIES). Ranges are the form limits, which
+# cover the dataset.
+SCHEMA = {
+    "Age": ("int", 18, 90),
+    "Sex": ("category", None, None),
+    "Cholesterol": ("int", 120, 400),
+    "Systolic_BP": ("int", 90, 180),
+    "Diastolic_BP": ("int", 60, 110),
+    "By_Product": ("int", 5400, 19800),
+    "Heart Rate": ("int", 40, 110),
+    "Diabetes": ("flag", 0, 1),
+    "Family History": ("flag", 0, 1),
+    "Obesity": ("flag", 0, 1),
+    "Smoking": ("flag", 0, 1),
+    "Alcohol Consumption": ("flag", 0, 1),
+    "Substance_Use": ("flag", 0, 1),
+    "Diet": ("category", None, None),
+    "Previous Heart Problems": ("flag", 0, 1),
+    "Medication Use": ("flag", 0, 1),
+    "BMI_Stress": ("float", 18.0, 399.9),
+    "BMI": ("float", 18.0, 39.99),
+    "Stress Level": ("int", 1, 10),
+    "Sleep Hours Per Day": ("int", 4, 10),
+    "Sleep_Stress_Interaction": ("int", 4, 100),
+    "Activity_Ratio": ("float", 0.0, np.inf),
+    "Exercise Hours Per Week": ("float", 0.0, 20.0),
+    "Sedentary Hours Per Day": ("float", 0.0, 12.0),
+    "Income": ("int", 20062, 299954),
+    "Triglycerides": ("int", 30, 800),
+    "Physical Activity Days Per Week": ("int", 0, 7),
+    "Country": ("category", None, None),
+}
+
+# The raw export's Continent for each Country; the cleaned layout drops it
+COUNTRY_CONTINENTS = {
+    "Argentina": "South America", "Australia": "Australia", "Brazil": "South America",
+    "Canada": "North America", "China": "Asia", "Colombia": "South America", "France": "Europe",
+    "Germany": "Europe", "India": "Asia", "Italy": "Europe", "Japan": "Asia",
+    "New Zealand": "Australia", "Nigeria": "Africa", "South Africa": "Africa",
+    "South Korea": "Asia", "Spain": "Europe", "Thailand": "Asia", "United Kingdom": "Europe",
+    "United States": "North America", "Vietnam": "Asia",
+}
+COUNTRIES = sorted(COUNTRY_CONTINENTS)
+
+CATEGORIES = {
+    "Sex": ["Female", "Male"],
+    "Diet": ["Average", "Healthy", "Unhealthy"],
+    "Country": COUNTRIES,
+}
+# Value -> code lookup tables
+CATEGORY_CODES = {column: {value: code for code, value in enumerate(values)}
+                  for column, values in CATEGORIES.items()}
+_SORTED_CATEGORIES = {column: np.array(sorted(values)) for column, values in CATEGORIES.items()}
+_SORTED_CODES = {column: np.array([CATEGORY_CODES[column][v] for v in _SORTED_CATEGORIES[column]], dtype=np.float64)
+                 for column in CATEGORIES}
+
+# Columns the model was fitted on (model.feature_names_in_), in order, with the
+# cleaned-dataset column each one is read from and the min/max used to scale it
+# to [0, 1] during training.
+MODEL_FEATURES = [
+    ("Sex_Male", "Sex", 0, 1),
+    ("Stress Level", "Stress Level", 1, 10),
+    ("Previous Heart Problems", "Previous Heart Problems", 0, 1),
+    ("Cholesterol", "Cholesterol", 120, 400),
+    ("Sleep Hours Per Day", "Sleep Hours Per Day", 4, 10),
+    ("Alcohol Consumption", "Alcohol Consumption", 0, 1),
+    ("Obesity", "Obesity", 0, 1),
+    ("BP_Product", "By_Product", 5400, 19800),
+    ("Income", "Income", 20062, 299954),
+    ("Sleep_Stress_Interaction", "Sleep_Stress_Interaction", 4, 100),
+]
+
+FEATURE_NAMES = [name for name, _, _, _ in MODEL_FEATURES]
+INPUT_COLUMNS = [column for _, column, _, _ in MODEL_FEATURES]
+
+# Display names for explanations, in model feature order
+FEATURE_LABELS = ["Sex", "Stress Level", "Previous Heart Problems", "Cholesterol", "Sleep Hours",
+                  "Alcohol Consumption", "Obesity", "Blood Pressure (Sys × Dia)", "Income", "Sleep × Stress"]
+
+_LOW = np.array([low for _, _, low, _ in MODEL_FEATURES], dtype=np.float64)
+_SPAN = np.array([high - low for _, _, low, high in MODEL_FEATURES], dtype=np.float64)
+
+
+def widget_range(column):
+    """(min_value, max_value) of a numeric column, typed for st.number_input."""
+    kind, low, high = SCHEMA[column]
+    return (int(low), int(high)) if kind in ("int", "flag") else (float(low), float(high))
+
+
+def _unknown(column, value):
+    return ValueError(f"unknown {column} {str(value)!r}; expected one of {', '.join(CATEGORIES[column])}")
+
+
+def encode(column, values):
+    """Codes of a category column's values (strings, or codes already); unknown values raise ValueError."""
+    if isinstance(values, str):
+        try:
+            return float(CATEGORY_CODES[column][values])
+        except KeyError:
+            raise _unknown(column, values) from None
+    values = np.asarray(values)
+    if values.dtype.kind in "iufb":
+        codes = values.astype(np.float64)
+        if codes.size and (codes.min() < 0 or codes.max() >= len(CATEGORIES[column])):
+            raise ValueError(f"{column} codes must be between 0 and {len(CATEGORIES[column]) - 1}")
+        return codes
+    categories = _SORTED_CATEGORIES[column]
+    position = np.minimum(np.searchsorted(categories, values), len(categories) - 1)
+    unknown = categories[position] != values
+    if unknown.any():
+        raise _unknown(column, values.ravel()[np.argmax(unknown)])
+    return _SORTED_CODES[column][position]
+
+
+def encode_sex(values):
+    """Map 'Male'/'Female' strings (or 1/0 codes) to the Sex_Male indicator."""
+    return encode("Sex", values)
+
+
+def _rows(frame):
+    return np.size(frame[INPUT_COLUMNS[0]])
+
+
+def _fill(frame, out, validate):
+    single = len(out) == 1
+    for j, column in enumerate(INPUT_COLUMNS):
+        values = frame[column]
+        if single:
+            if isinstance(values, list):
+                values = values[0]
+            elif np.ndim(values):
+                values = np.asarray(values).ravel()[0]
+        if SCHEMA[column][0] == "category":
+            out[:, j] = encode(column, values)
+            continue
+        out[:, j] = values
+        if validate:
+            _, low, high = SCHEMA[column]
+            lowest, highest = (out[0, j], out[0, j]) if single else (out[:, j].min(), out[:, j].max())
+            # NaN fails both comparisons, so missing values are caught here too
+            if not (low <= lowest and highest <= high):
+                raise ValueError(f"{column} must be between {low} and {high}")
+    out -= _LOW
+    out /= _SPAN
+    return out
+
+
+def model_matrix(frame, validate=True):
+    """Build the scaled model input matrix from cleaned-schema columns.
+
+    `frame` is anything indexable by column name (a DataFrame, a dict of
+    equal-length arrays, or a dict of scalars for one patient). Missing
+    columns raise KeyError naming the column; with `validate`, out-of-range
+    values and unknown categories raise ValueError.
+    """
+    return _fill(frame, np.empty((_rows(frame), len(MODEL_FEATURES))), validate)
+
+
+class Vectorizer:
+    """model_matrix into a reusable buffer.
+
+    The returned matrix is a view of the buffer and is overwritten by the
+    next call, so use one Vectorizer per thread or session and copy the
+    result if it has to outlive the call. The buffer grows to the largest
+    batch seen.
+    """
+
+    def __init__(self, rows=1):
+        self._buffer = np.empty((rows, len(MODEL_FEATURES)))
+
+    def transform(self, frame, validate=True):
+        n = _rows(frame)
+        if n > len(self._buffer):
+            self._buffer = np.empty((max(n, 2 * len(self._buffer)), len(MODEL_FEATURES)))
+        return _fill(frame, self._buffer[:n], validate)
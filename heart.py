@@ -1,7 +1,19 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import pickle
+import json
+import os
+import tempfile
+import time
+
+from cache import PredictionCache
+from features import CATEGORIES, COUNTRIES, COUNTRY_CONTINENTS, FEATURE_LABELS, Vectorizer, widget_range
+from pipeline import add_derived_features
+import scoring
+from scoring import score_csv
+import startup
+
+# Analytics, explanations, what-if and metrics modules are imported by the
+# features that use them, so a first page view only loads what it renders
 
 # Page configuration
 st.set_page_config(
@@ -11,8 +23,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Professional styling
-st.markdown("""
+# Static markup is built once per process; each run only sends it to the browser
+@st.cache_data
+def page_css():
+    return """
     <style>
     .main {
         background-color: #f8f9fa;
@@ -33,7 +47,7 @@ st.markdown("""
         color: #2563eb;
         font-family: 'Helvetica Neue', sans-serif;
     }
-    .stButton>button {
+    .stButton>button, .stFormSubmitButton>button {
         background: linear-gradient(135deg, #3b82f6 0%, #1e40af 100%);
         color: white;
         font-size: 16px;
@@ -45,7 +59,7 @@ st.markdown("""
         transition: all 0.3s ease;
         width: 100%;
     }
-    .stButton>button:hover {
+    .stButton>button:hover, .stFormSubmitButton>button:hover {
         box-shadow: 0 6px 12px rgba(0, 0, 0, 0.15);
         transform: translateY(-2px);
     }
@@ -64,64 +78,136 @@ st.markdown("""
         margin: 10px 0;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
 
-# Load model
-@st.cache_resource
-def load_model():
+# Professional styling
+st.markdown(page_css(), unsafe_allow_html=True)
+
+# Load model (with the fast tier in front, if one was distilled). The cache is
+# keyed on the published files' paths and mtimes, so a newly published version
+# is picked up on the next rerun without a restart. startup.scorer() shares the
+# model pre-warmed by `python startup.py run heart.py`, if the app was started that way.
+@st.cache_resource(max_entries=2)
+def load_model(source):
     try:
-        with open("heart_model.pkl", "rb") as file:
-            model = pickle.load(file)
-        return model
+        return startup.scorer(source)
     except FileNotFoundError:
         st.error("⚠️ Model file not found. Please ensure 'heart_model.pkl' is in the correct directory.")
         return None
 
-model = load_model()
+model = load_model(scoring.model_source())
+
+# Optional Prometheus endpoint for this worker, e.g. HEART_METRICS_PORT=9108
+@st.cache_resource
+def start_metrics_exporter(port):
+    from metrics import start_http_server
+
+    return start_http_server(int(port))
+
+if os.environ.get("HEART_METRICS_PORT"):
+    start_metrics_exporter(os.environ["HEART_METRICS_PORT"])
+
+# Structured prediction log lines on stderr, e.g. HEART_LOG_LEVEL=INFO
+@st.cache_resource
+def configure_logging(level):
+    from metrics import configure_logging
+
+    configure_logging(level)
+
+if os.environ.get("HEART_LOG_LEVEL"):
+    configure_logging(os.environ["HEART_LOG_LEVEL"])
+
+# Predictions are shared by every session in this process
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache(maxsize=4096)
+
+prediction_cache = get_prediction_cache()
+
+# Explanations are cached per feature vector inside the explainer
+@st.cache_resource(max_entries=2)
+def get_explainer(_model, version):
+    from explain import Explainer
+
+    return Explainer(_model) if _model is not None else None
+
+# Cohort aggregates, built once per process from the raw export
+@st.cache_resource
+def get_cohort_index():
+    import cohort
+
+    try:
+        return cohort.build_index()
+    except FileNotFoundError:
+        return None
+
+# Input drift against the training data, counted over every session in this process
+@st.cache_resource
+def get_drift_monitor():
+    import drift
+
+    return drift.load_monitor()
+
+# The sidebar is static, so the counters refresh on their own timer
+@st.fragment(run_every="15s")
+def cache_stats():
+    stats = prediction_cache.stats()
+    st.caption(f"{stats['size']:,} / {stats['maxsize']:,} entries · {stats['hits']:,} hits · "
+               f"{stats['misses']:,} misses · {stats['evictions']:,} evictions")
+
+@st.cache_data
+def sidebar_markdown():
+    return """
+## 📊 Clinical Decision Support
+
+---
+
+### About This Tool
+This clinical decision support system utilizes advanced machine learning
+algorithms to assess cardiovascular disease risk based on comprehensive
+patient health metrics and lifestyle factors.
+
+---
+
+### 🔬 Model Information
+- **Training Dataset:** 8,763 patient records
+- **Features Analyzed:** 29 clinical indicators
+- **Purpose:** Risk stratification & screening
+
+---
+
+### 📋 Assessment Process
+1. **Input Data:** Complete all patient information fields
+2. **Validation:** System validates data integrity
+3. **Analysis:** ML model processes health indicators
+4. **Results:** Receive risk assessment with recommendations
+
+---
+
+### ⚕️ Important Notice
+"""
 
 # Professional sidebar
 with st.sidebar:
     #st.image("https://img.icons8.com/color/96/000000/heartbeat.png", width=80)
-    st.markdown("## 📊 Clinical Decision Support")
-    st.markdown("---")
-    
-    st.markdown("### About This Tool")
-    st.markdown("""
-    This clinical decision support system utilizes advanced machine learning 
-    algorithms to assess cardiovascular disease risk based on comprehensive 
-    patient health metrics and lifestyle factors.
-    """)
-    
-    st.markdown("---")
-    st.markdown("### 🔬 Model Information")
-    st.markdown("""
-    - **Training Dataset:** 8,763 patient records
-    - **Features Analyzed:** 29 clinical indicators
-    - **Purpose:** Risk stratification & screening
-    """)
-    
-    st.markdown("---")
-    st.markdown("### 📋 Assessment Process")
-    st.markdown("""
-    1. **Input Data:** Complete all patient information fields
-    2. **Validation:** System validates data integrity
-    3. **Analysis:** ML model processes health indicators
-    4. **Results:** Receive risk assessment with recommendations
-    """)
-    
-    st.markdown("---")
-    st.markdown("### ⚕️ Important Notice")
+    st.markdown(sidebar_markdown())
     st.warning("""
     This tool is designed for educational and screening purposes only. 
     It does not replace professional medical diagnosis or clinical judgment.
     """)
 
+    st.markdown("---")
+    with st.expander("🗄️ Prediction Cache"):
+        cache_stats()
+
 # Header section
 st.title("🫀 Cardiovascular Disease Risk Assessment System")
 st.markdown("---")
 
 # Introduction
-st.markdown("""
+@st.cache_data
+def intro_html():
+    return """
 <div class="info-box">
 <h3>Welcome to the Professional Heart Health Assessment Platform</h3>
 <p>This evidence-based risk assessment tool employs machine learning methodology to evaluate 
@@ -129,294 +215,585 @@ cardiovascular disease probability through comprehensive analysis of clinical pa
 lifestyle factors, and patient demographics. The system provides data-driven insights to 
 support early detection and preventive care strategies.</p>
 </div>
-""", unsafe_allow_html=True)
+"""
 
-st.info("📌 **Note:** All information provided is confidential and used solely for risk calculation purposes.")
-
-# Input form section
-st.markdown("---")
-st.markdown("## 📝 Patient Information & Clinical Data Entry")
-st.markdown("Please provide accurate information for all fields to ensure optimal assessment accuracy.")
+st.markdown(intro_html(), unsafe_allow_html=True)
 
-# Create tabs for organized input
-tab1, tab2, tab3, tab4 = st.tabs(["👤 Demographics & Vitals", "🧬 Medical History", "💊 Lifestyle Factors", "🔬 Laboratory Values"])
+st.info("📌 **Note:** All information provided is confidential and used solely for risk calculation purposes.")
 
-# Initialize variables
-with tab1:
-    st.markdown("### Basic Patient Information")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        Age = st.number_input("Age (years)", min_value=18, max_value=90, value=45, help="Patient's current age in years")
-        Sex = st.selectbox("Biological Sex", options=[0, 1], format_func=lambda x: "Female" if x == 0 else "Male", index=1)
-        BMI = st.number_input("Body Mass Index (kg/m²)", min_value=18.00, max_value=39.99, value=25.0, format="%.2f", 
-                            help="Weight in kg divided by height in meters squared")
-        Country = st.selectbox('Country of Residence', [
-            'Argentina', 'Australia', 'Brazil', 'Canada', 'China', 'Colombia', 
-            'France', 'Germany', 'India', 'Italy', 'Japan', 'New Zealand', 
-            'Nigeria', 'South Africa', 'South Korea', 'Spain', 'Thailand', 
-            'United States', 'Vietnam'
-        ])
-    
-    with col2:
-        Systolic = st.number_input("Systolic Blood Pressure (mmHg)", min_value=90, max_value=180, value=120, 
-                                  help="Upper blood pressure reading")
-        Diastolic = st.number_input("Diastolic Blood Pressure (mmHg)", min_value=60, max_value=110, value=80,
-                                   help="Lower blood pressure reading")
-        Heart = st.number_input("Resting Heart Rate (bpm)", min_value=40, max_value=110, value=70,
-                              help="Beats per minute at rest")
-        Income = st.number_input("Annual Income (USD)", min_value=20062, max_value=299954, value=60000,
-                               help="Socioeconomic indicator")
-
-with tab2:
-    st.markdown("### Medical History & Risk Factors")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        Diabetes = st.selectbox("Diabetes Mellitus", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
-                               help="History of diabetes diagnosis")
-        Family = st.selectbox("Family History of Heart Disease", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
-                            help="First-degree relatives with cardiovascular disease")
-        Previous = st.selectbox("Previous Cardiac Events", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
-                              help="History of heart attack, angina, or cardiac procedures")
-        Obesity = st.selectbox("Clinical Obesity", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
-                             help="BMI ≥ 30 kg/m² or clinical diagnosis")
-    
-    with col2:
-        Medication = st.selectbox("Current Cardiac Medications", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
-                                help="Taking medications for heart/blood pressure")
-        Attack = st.selectbox("High Heart Attack Risk (Clinical Assessment)", options=[0, 1], 
-                            format_func=lambda x: "No" if x == 0 else "Yes")
-        Substance = st.selectbox("Substance Use History", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
-                               help="History of drug use affecting cardiovascular health")
-
-with tab3:
-    st.markdown("### Lifestyle & Behavioral Factors")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        Smoking = st.selectbox("Smoking Status", options=[0, 1], format_func=lambda x: "Non-Smoker" if x == 0 else "Current/Former Smoker")
-        Alcohol = st.selectbox("Alcohol Consumption", options=[0, 1], format_func=lambda x: "No/Minimal" if x == 0 else "Regular Use",
-                             help="Regular alcohol consumption")
-        Diet = st.selectbox("Diet Quality", options=[0, 1, 2], format_func=lambda x: ['Average', 'Healthy', 'Unhealthy'][x],
-                          help="Overall dietary pattern assessment")
-        Exercise = st.number_input("Exercise Hours Per Week", min_value=0.0, max_value=20.0, value=3.0, step=0.5,
-                                 help="Moderate to vigorous physical activity")
-    
-    with col2:
-        Activity = st.number_input("Physical Activity Days Per Week", min_value=0, max_value=7, value=3,
-                                 help="Days with ≥30 minutes of activity")
-        Sedentary = st.number_input("Sedentary Hours Per Day", min_value=0.0, max_value=12.0, value=6.0, step=0.5,
-                                   help="Hours spent sitting/inactive")
-        Sleep = st.number_input("Average Sleep Hours Per Day", min_value=4, max_value=10, value=7,
-                              help="Average nightly sleep duration")
-        Level = st.number_input("Stress Level (1-10 scale)", min_value=1, max_value=10, value=5,
-                              help="Self-reported stress assessment")
-
-with tab4:
-    st.markdown("### Laboratory Values & Calculated Metrics")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        Cholesterol = st.number_input("Total Cholesterol (mg/dL)", min_value=120, max_value=400, value=200,
-                                    help="Total serum cholesterol")
-        Triglycerides = st.number_input("Triglycerides (mg/dL)", min_value=30, max_value=800, value=150,
-                                      help="Serum triglyceride level")
-        BP = st.number_input("Blood Pressure Product (mmHg)", min_value=5400, max_value=19800, value=9600,
-                           help="Systolic × Diastolic (calculated metric)")
-    
-    with col2:
-        Stress = st.number_input("BMI-Stress Index", min_value=18.00, max_value=399.85, value=125.0, format="%.2f",
-                               help="Composite stress-BMI metric")
-        Ratio = st.number_input("Activity-to-Sedentary Ratio", min_value=0.0, max_value=20.0, value=0.5, step=0.1,
-                              help="Physical activity divided by sedentary time")
-        Interaction = st.number_input("Sleep-Stress Interaction Score", min_value=4, max_value=100, value=35,
-                                    help="Sleep hours × stress level")
-
-# Prediction section
-st.markdown("---")
-st.markdown("## 🔍 Risk Assessment Analysis")
+# Risk report for a submitted patient; a fragment, so anything inside it
+# refreshes without rerunning the rest of the page
+@st.fragment
+def risk_report(patient):
+    import pandas as pd
 
-col1, col2, col3 = st.columns([1, 2, 1])
-with col2:
-    predict_button = st.button("🔬 Generate Risk Assessment Report", use_container_width=True, type="primary")
+    from metrics import METRICS, record_error, record_prediction
 
-if predict_button:
     if model is None:
         st.error("❌ Model not loaded. Cannot perform assessment.")
-    else:
-        with st.spinner("🔄 Analyzing patient data and computing risk scores..."):
-            # Prepare all 29 features
-            country_encoded = ['Argentina', 'Australia', 'Brazil', 'Canada', 'China', 'Colombia', 
-                             'France', 'Germany', 'India', 'Italy', 'Japan', 'New Zealand', 
-                             'Nigeria', 'South Africa', 'South Korea', 'Spain', 'Thailand', 
-                             'United States', 'Vietnam'].index(Country)
-            
-            inputs = [
-                Age, Sex, Cholesterol, Heart, Diabetes, Family, Smoking, Obesity, 
-                Alcohol, Exercise
-            ]
-            
-            inputs_array = np.array(inputs).reshape(1, -1)
-            
-            try:
-                prediction = model.predict(inputs_array)
-                
-                # Get probability scores if available
-                try:
-                    probability = model.predict_proba(inputs_array)[0]
-                    low_risk_prob = probability[0] * 100
-                    high_risk_prob = probability[1] * 100
-                    has_probability = True
-                except AttributeError:
-                    # Model doesn't support predict_proba
-                    has_probability = False
-                    low_risk_prob = 0
-                    high_risk_prob = 0
-                
-                st.markdown("---")
-                st.markdown("## 📊 Assessment Results")
-                
-                # Display probability metrics if available
-                if has_probability:
-                    st.markdown("### 📈 Risk Probability Scores")
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.metric(
-                            label="Low Risk Probability",
-                            value=f"{low_risk_prob:.1f}%",
-                            delta=None
-                        )
-                    
-                    with col2:
-                        st.metric(
-                            label="High Risk Probability",
-                            value=f"{high_risk_prob:.1f}%",
-                            delta=None
-                        )
-                    
-                    with col3:
-                        confidence = max(low_risk_prob, high_risk_prob)
-                        st.metric(
-                            label="Model Confidence",
-                            value=f"{confidence:.1f}%",
-                            delta=None
-                        )
-                    
-                    # Visual probability bar
-                    st.markdown("#### Risk Distribution")
-                    st.progress(high_risk_prob / 100)
-                    st.caption(f"Risk Spectrum: {low_risk_prob:.1f}% Low Risk ← → {high_risk_prob:.1f}% High Risk")
-                    st.markdown("---")
-
-                
-                st.markdown("---")
-                st.markdown("## 📊 Assessment Results")
-                
-                if prediction[0] == 1:
-                    st.markdown("""
-                    <div style='background-color: #fef2f2; padding: 30px; border-radius: 10px; border-left: 6px solid #dc2626;'>
-                        <h2 style='color: #dc2626; margin-top: 0;'>⚠️ HIGH CARDIOVASCULAR RISK DETECTED</h2>
-                        <p style='font-size: 16px; color: #7f1d1d;'>
-                        The risk assessment model has identified a <strong>high probability</strong> of cardiovascular disease 
-                        based on the provided clinical and lifestyle data. <strong>Immediate medical consultation is strongly recommended.</strong>
-                        </p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    st.markdown("### 🏥 Recommended Clinical Actions")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("""
-                        **Immediate Steps:**
-                        - 🩺 Schedule comprehensive cardiac evaluation
-                        - 📋 Complete full lipid panel and cardiac biomarkers
-                        - 💊 Review and optimize medication regimen
-                        - 📊 Baseline ECG and stress testing
-                        - 🔬 Consider advanced cardiac imaging if indicated
-                        """)
-                    
-                    with col2:
-                        st.markdown("""
-                        **Lifestyle Interventions:**
-                        - 🥗 Adopt DASH or Mediterranean diet
-                        - 🚭 Immediate smoking cessation support
-                        - 🏃‍♂️ Supervised cardiac rehabilitation program
-                        - 😌 Stress management and mental health support
-                        - 💤 Sleep hygiene optimization
-                        """)
-                    
-                    st.markdown("### 📈 Monitoring Protocol")
+        return
+    explainer = get_explainer(model, getattr(model, "model_version", None))
+
+    with st.spinner("🔄 Analyzing patient data and computing risk scores..."):
+        start = time.perf_counter()
+        stages = {}
+        stage = "feature_assembly"
+        try:
+            # Map the patient onto the model's scaled feature vector, in this session's reusable buffer
+            with METRICS.time(stage, stages):
+                inputs_array = st.session_state.setdefault("vectorizer", Vectorizer()).transform(patient)
+
+            # One predict_proba call (or a cache hit); the label is derived from the probabilities
+            stage = "predict_proba"
+            with METRICS.time(stage, stages):
+                prediction, high_risk = prediction_cache.predict_risk(model, inputs_array, record=True)
+            stage = "explain"
+            with METRICS.time(stage, stages):
+                contributions = explainer.explain(inputs_array)[0]
+            stage = "render"
+            render_start = time.perf_counter()
+            high_risk_prob = high_risk[0] * 100
+            low_risk_prob = 100 - high_risk_prob
+
+            st.markdown("---")
+            st.markdown("## 📊 Assessment Results")
+
+            # Display probability metrics
+            st.markdown("### 📈 Risk Probability Scores")
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                st.metric(
+                    label="Low Risk Probability",
+                    value=f"{low_risk_prob:.1f}%",
+                    delta=None
+                )
+
+            with col2:
+                st.metric(
+                    label="High Risk Probability",
+                    value=f"{high_risk_prob:.1f}%",
+                    delta=None
+                )
+
+            with col3:
+                confidence = max(low_risk_prob, high_risk_prob)
+                st.metric(
+                    label="Model Confidence",
+                    value=f"{confidence:.1f}%",
+                    delta=None
+                )
+
+            # Visual probability bar
+            st.markdown("#### Risk Distribution")
+            st.progress(high_risk_prob / 100)
+            st.caption(f"Risk Spectrum: {low_risk_prob:.1f}% Low Risk ← → {high_risk_prob:.1f}% High Risk")
+            st.markdown("---")
+
+
+            st.markdown("---")
+            st.markdown("## 📊 Assessment Results")
+
+            # Which of this patient's values moved the score, and by how much
+            st.markdown("### 🔍 Key Risk Drivers")
+            drivers = pd.DataFrame({"Feature": FEATURE_LABELS,
+                                    "Contribution (pp)": contributions * 100}).set_index("Feature")
+            drivers = drivers.sort_values("Contribution (pp)", key=abs, ascending=False)
+            st.bar_chart(drivers, horizontal=True, color="#dc2626" if prediction[0] == 1 else "#16a34a")
+            raising = [label for label, value in drivers["Contribution (pp)"].items() if value > 0.5][:3]
+            lowering = [label for label, value in drivers["Contribution (pp)"].items() if value < -0.5][:3]
+            st.caption(f"Scores are measured against a typical patient at {explainer.base_value * 100:.1f}% "
+                       "high risk; each bar is how far that input moves this patient's score, in percentage points.")
+            if raising:
+                st.markdown(f"**Raising risk:** {', '.join(raising)}")
+            if lowering:
+                st.markdown(f"**Lowering risk:** {', '.join(lowering)}")
+
+            if prediction[0] == 1:
+                st.markdown("""
+                <div style='background-color: #fef2f2; padding: 30px; border-radius: 10px; border-left: 6px solid #dc2626;'>
+                    <h2 style='color: #dc2626; margin-top: 0;'>⚠️ HIGH CARDIOVASCULAR RISK DETECTED</h2>
+                    <p style='font-size: 16px; color: #7f1d1d;'>
+                    The risk assessment model has identified a <strong>high probability</strong> of cardiovascular disease 
+                    based on the provided clinical and lifestyle data. <strong>Immediate medical consultation is strongly recommended.</strong>
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
+
+                st.markdown("### 🏥 Recommended Clinical Actions")
+
+                col1, col2 = st.columns(2)
+
+                with col1:
                     st.markdown("""
-                    - **Follow-up Frequency:** Every 3-6 months or as directed by cardiologist
-                    - **Key Metrics to Track:** Blood pressure, cholesterol, weight, physical activity
-                    - **Emergency Signs:** Chest pain, shortness of breath, palpitations, unusual fatigue
+                    **Immediate Steps:**
+                    - 🩺 Schedule comprehensive cardiac evaluation
+                    - 📋 Complete full lipid panel and cardiac biomarkers
+                    - 💊 Review and optimize medication regimen
+                    - 📊 Baseline ECG and stress testing
+                    - 🔬 Consider advanced cardiac imaging if indicated
                     """)
-                    
-                else:
+
+                with col2:
                     st.markdown("""
-                    <div style='background-color: #f0fdf4; padding: 30px; border-radius: 10px; border-left: 6px solid #16a34a;'>
-                        <h2 style='color: #16a34a; margin-top: 0;'>✅ LOW CARDIOVASCULAR RISK</h2>
-                        <p style='font-size: 16px; color: #14532d;'>
-                        The assessment indicates a <strong>low probability</strong> of cardiovascular disease based on 
-                        current health metrics. Continue maintaining healthy lifestyle practices and regular health monitoring.
-                        </p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    st.markdown("### 💚 Preventive Health Maintenance")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("""
-                        **Continue Current Practices:**
-                        - ✅ Maintain balanced, nutrient-rich diet
-                        - ✅ Regular cardiovascular exercise routine
-                        - ✅ Consistent sleep schedule (7-9 hours)
-                        - ✅ Stress management techniques
-                        - ✅ Avoid tobacco and limit alcohol
-                        """)
-                    
-                    with col2:
-                        st.markdown("""
-                        **Routine Monitoring:**
-                        - 📅 Annual health check-ups
-                        - 🩺 Blood pressure monitoring
-                        - 📊 Lipid panel every 2-5 years
-                        - ⚖️ Maintain healthy weight
-                        - 🏃 Stay physically active
-                        """)
-                    
-                    st.markdown("### 🎯 Optimization Opportunities")
-                    st.info("""
-                    Even with low risk, there's always room for improvement. Consider:
-                    - Increasing physical activity if below recommended levels
-                    - Further dietary improvements (more vegetables, whole grains)
-                    - Enhanced stress reduction techniques (meditation, yoga)
-                    - Building strong social connections for mental health
+                    **Lifestyle Interventions:**
+                    - 🥗 Adopt DASH or Mediterranean diet
+                    - 🚭 Immediate smoking cessation support
+                    - 🏃‍♂️ Supervised cardiac rehabilitation program
+                    - 😌 Stress management and mental health support
+                    - 💤 Sleep hygiene optimization
                     """)
-                
-                # General recommendations
-                st.markdown("---")
-                st.markdown("### 📚 Evidence-Based Resources")
+
+                st.markdown("### 📈 Monitoring Protocol")
                 st.markdown("""
-                - **American Heart Association:** Heart-healthy living guidelines
-                - **CDC Heart Disease Prevention:** www.cdc.gov/heartdisease
-                - **National Heart, Lung, and Blood Institute:** Educational materials
-                - **Local Cardiac Rehabilitation Programs:** Contact your healthcare provider
+                - **Follow-up Frequency:** Every 3-6 months or as directed by cardiologist
+                - **Key Metrics to Track:** Blood pressure, cholesterol, weight, physical activity
+                - **Emergency Signs:** Chest pain, shortness of breath, palpitations, unusual fatigue
                 """)
-                
-            except Exception as e:
-                st.error(f"❌ Error during risk assessment: {str(e)}")
-                st.info("Please verify all input fields are completed correctly and try again.")
+
+            else:
+                st.markdown("""
+                <div style='background-color: #f0fdf4; padding: 30px; border-radius: 10px; border-left: 6px solid #16a34a;'>
+                    <h2 style='color: #16a34a; margin-top: 0;'>✅ LOW CARDIOVASCULAR RISK</h2>
+                    <p style='font-size: 16px; color: #14532d;'>
+                    The assessment indicates a <strong>low probability</strong> of cardiovascular disease based on 
+                    current health metrics. Continue maintaining healthy lifestyle practices and regular health monitoring.
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
+
+                st.markdown("### 💚 Preventive Health Maintenance")
+
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.markdown("""
+                    **Continue Current Practices:**
+                    - ✅ Maintain balanced, nutrient-rich diet
+                    - ✅ Regular cardiovascular exercise routine
+                    - ✅ Consistent sleep schedule (7-9 hours)
+                    - ✅ Stress management techniques
+                    - ✅ Avoid tobacco and limit alcohol
+                    """)
+
+                with col2:
+                    st.markdown("""
+                    **Routine Monitoring:**
+                    - 📅 Annual health check-ups
+                    - 🩺 Blood pressure monitoring
+                    - 📊 Lipid panel every 2-5 years
+                    - ⚖️ Maintain healthy weight
+                    - 🏃 Stay physically active
+                    """)
+
+                st.markdown("### 🎯 Optimization Opportunities")
+                st.info("""
+                Even with low risk, there's always room for improvement. Consider:
+                - Increasing physical activity if below recommended levels
+                - Further dietary improvements (more vegetables, whole grains)
+                - Enhanced stress reduction techniques (meditation, yoga)
+                - Building strong social connections for mental health
+                """)
+
+            # General recommendations
+            st.markdown("---")
+            st.markdown("### 📚 Evidence-Based Resources")
+            st.markdown("""
+            - **American Heart Association:** Heart-healthy living guidelines
+            - **CDC Heart Disease Prevention:** www.cdc.gov/heartdisease
+            - **National Heart, Lung, and Blood Institute:** Educational materials
+            - **Local Cardiac Rehabilitation Programs:** Contact your healthcare provider
+            """)
+
+            render_seconds = time.perf_counter() - render_start
+            METRICS.observe("heart_stage_seconds", render_seconds, stage="render")
+            stages["render"] = round(render_seconds, 6)
+            record_prediction(prediction, time.perf_counter() - start, stages)
+            startup.first_prediction()
+
+        except Exception as e:
+            record_error(e, stage)
+            st.error(f"❌ Error during risk assessment: {str(e)}")
+            st.info("Please verify all input fields are completed correctly and try again.")
+
+
+# What-if sweeps rerun only this fragment; the grid is scored in one batched call
+@st.fragment
+def what_if_panel(patient):
+    from whatif import MODEL_INPUTS, SWEEPABLE, risk_grid, sweep_values
+
+    if model is None:
+        return
+
+    st.markdown("---")
+    st.markdown("## 🧪 What-If Analysis")
+    st.markdown("Explore how the risk estimate changes as one or two inputs vary across their full range, "
+                "with every other value held at this patient's data.")
+
+    features = list(SWEEPABLE)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        x_feature = st.selectbox("Sweep", features, index=features.index("Cholesterol"))
+    with col2:
+        y_options = ["(none)"] + [f for f in features if f != x_feature]
+        y_feature = st.selectbox("Against", y_options, index=y_options.index("Stress Level"))
+    with col3:
+        steps = st.slider("Grid resolution", min_value=10, max_value=100, value=50, step=10)
+    y_feature = None if y_feature == "(none)" else y_feature
+
+    ignored = [f for f in (x_feature, y_feature) if f is not None and f not in MODEL_INPUTS]
+    if ignored:
+        st.caption(f"ℹ️ The current model does not use {' or '.join(ignored)}, so the risk is flat along it.")
+
+    x_values = sweep_values(x_feature, steps)
+    y_values = sweep_values(y_feature, steps) if y_feature else None
+    start = time.perf_counter()
+    surface = risk_grid(model, patient, x_feature, x_values, y_feature, y_values) * 100
+    elapsed = time.perf_counter() - start
+
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 4.5))
+    if y_feature is None:
+        ax.plot(x_values, surface, color="#dc2626")
+        ax.set_ylabel("High Risk Probability (%)")
+        ax.set_ylim(0, 100)
+        ax.axvline(np.asarray(patient[x_feature])[0], color="#1e40af", linestyle="--", label="Current patient")
+    else:
+        image = ax.pcolormesh(x_values, y_values, surface, cmap="RdYlGn_r", vmin=0, vmax=100, shading="nearest")
+        fig.colorbar(image, ax=ax, label="High Risk Probability (%)")
+        ax.scatter(np.asarray(patient[x_feature])[0], np.asarray(patient[y_feature])[0],
+                   marker="x", color="black", s=80, label="Current patient")
+        ax.set_ylabel(y_feature)
+    ax.set_xlabel(x_feature)
+    ax.legend(loc="upper right")
+    st.pyplot(fig)
+    plt.close(fig)
+    st.caption(f"Scored {surface.size:,} scenarios in {elapsed * 1000:.0f} ms with one batched model call.")
+
+
+def limits(column):
+    low, high = widget_range(column)
+    return {"min_value": low, "max_value": high}
+
+
+# Patient entry: edits are batched in a form, and a submit reruns only this
+# fragment, which recomputes the calculated metrics and draws the report below
+@st.fragment
+def patient_assessment():
+    # Input section
+    st.markdown("---")
+    st.markdown("## 📝 Patient Information & Clinical Data Entry")
+    st.markdown("Please provide accurate information for all fields to ensure optimal assessment accuracy.")
+
+    form = st.form("patient_form", border=False)
+    # Create tabs for organized input
+    tab1, tab2, tab3, tab4 = form.tabs(["👤 Demographics & Vitals", "🧬 Medical History", "💊 Lifestyle Factors", "🔬 Laboratory Values"])
+
+    # Initialize variables
+    with tab1:
+        st.markdown("### Basic Patient Information")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            Age = st.number_input("Age (years)", **limits("Age"), value=45, help="Patient's current age in years")
+            Sex = st.selectbox("Biological Sex", options=[0, 1], format_func=lambda x: "Female" if x == 0 else "Male", index=1)
+            BMI = st.number_input("Body Mass Index (kg/m²)", **limits("BMI"), value=25.0, format="%.2f", 
+                                help="Weight in kg divided by height in meters squared")
+            Country = st.selectbox('Country of Residence', COUNTRIES)
+
+        with col2:
+            Systolic = st.number_input("Systolic Blood Pressure (mmHg)", **limits("Systolic_BP"), value=120, 
+                                      help="Upper blood pressure reading")
+            Diastolic = st.number_input("Diastolic Blood Pressure (mmHg)", **limits("Diastolic_BP"), value=80,
+                                       help="Lower blood pressure reading")
+            Heart = st.number_input("Resting Heart Rate (bpm)", **limits("Heart Rate"), value=70,
+                                  help="Beats per minute at rest")
+            Income = st.number_input("Annual Income (USD)", **limits("Income"), value=60000,
+                                   help="Socioeconomic indicator")
+
+    with tab2:
+        st.markdown("### Medical History & Risk Factors")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            Diabetes = st.selectbox("Diabetes Mellitus", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
+                                   help="History of diabetes diagnosis")
+            Family = st.selectbox("Family History of Heart Disease", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
+                                help="First-degree relatives with cardiovascular disease")
+            Previous = st.selectbox("Previous Cardiac Events", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
+                                  help="History of heart attack, angina, or cardiac procedures")
+            Obesity = st.selectbox("Clinical Obesity", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
+                                 help="BMI ≥ 30 kg/m² or clinical diagnosis")
+
+        with col2:
+            Medication = st.selectbox("Current Cardiac Medications", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes",
+                                    help="Taking medications for heart/blood pressure")
+
+    with tab3:
+        st.markdown("### Lifestyle & Behavioral Factors")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            Smoking = st.selectbox("Smoking Status", options=[0, 1], format_func=lambda x: "Non-Smoker" if x == 0 else "Current/Former Smoker")
+            Alcohol = st.selectbox("Alcohol Consumption", options=[0, 1], format_func=lambda x: "No/Minimal" if x == 0 else "Regular Use",
+                                 help="Regular alcohol consumption")
+            Diet = st.selectbox("Diet Quality", options=CATEGORIES["Diet"],
+                              help="Overall dietary pattern assessment")
+            Exercise = st.number_input("Exercise Hours Per Week", **limits("Exercise Hours Per Week"), value=3.0, step=0.5,
+                                     help="Moderate to vigorous physical activity")
+
+        with col2:
+            Activity = st.number_input("Physical Activity Days Per Week", **limits("Physical Activity Days Per Week"), value=3,
+                                     help="Days with ≥30 minutes of activity")
+            Sedentary = st.number_input("Sedentary Hours Per Day", **limits("Sedentary Hours Per Day"), value=6.0, step=0.5,
+                                       help="Hours spent sitting/inactive")
+            Sleep = st.number_input("Average Sleep Hours Per Day", **limits("Sleep Hours Per Day"), value=7,
+                                  help="Average nightly sleep duration")
+            Level = st.number_input("Stress Level (1-10 scale)", **limits("Stress Level"), value=5,
+                                  help="Self-reported stress assessment")
+
+    with tab4:
+        st.markdown("### Laboratory Values")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            Cholesterol = st.number_input("Total Cholesterol (mg/dL)", **limits("Cholesterol"), value=200,
+                                        help="Total serum cholesterol")
+            Triglycerides = st.number_input("Triglycerides (mg/dL)", **limits("Triglycerides"), value=150,
+                                          help="Serum triglyceride level")
+
+    col1, col2, col3 = form.columns([1, 2, 1])
+    with col2:
+        submitted = st.form_submit_button("🔬 Generate Risk Assessment Report", use_container_width=True,
+                                          type="primary")
+
+    # Calculated metrics come from the same feature pipeline used on the datasets;
+    # outside the form, they show the submitted values the report is scored on
+    patient = add_derived_features({
+        "Age": [Age], "Sex": [CATEGORIES["Sex"][Sex]], "Cholesterol": [Cholesterol],
+        "Systolic_BP": [Systolic], "Diastolic_BP": [Diastolic], "Heart Rate": [Heart],
+        "Diabetes": [Diabetes], "Family History": [Family], "Obesity": [Obesity], "Smoking": [Smoking],
+        "Alcohol Consumption": [Alcohol], "Diet": [Diet],
+        "Previous Heart Problems": [Previous], "Medication Use": [Medication], "BMI": [BMI],
+        "Stress Level": [Level], "Sleep Hours Per Day": [Sleep], "Exercise Hours Per Week": [Exercise],
+        "Sedentary Hours Per Day": [Sedentary], "Income": [Income], "Triglycerides": [Triglycerides],
+        "Physical Activity Days Per Week": [Activity], "Country": [Country],
+    })
+
+    st.markdown("### Calculated Metrics")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Blood Pressure Product (mmHg)", f"{patient['By_Product'][0]:,}",
+                help="Systolic × Diastolic (calculated metric)")
+    col2.metric("BMI-Stress Index", f"{patient['BMI_Stress'][0]:.2f}", help="BMI × stress level")
+    col3.metric("Activity-to-Sedentary Ratio", f"{patient['Activity_Ratio'][0]:.2f}",
+                help="Exercise hours divided by sedentary hours")
+    col4.metric("Sleep-Stress Interaction Score", f"{patient['Sleep_Stress_Interaction'][0]}",
+                help="Sleep hours × stress level")
+
+    # Prediction section
+    st.markdown("---")
+    st.markdown("## 🔍 Risk Assessment Analysis")
+
+    if submitted:
+        st.session_state.patient = patient
+        drift_monitor = get_drift_monitor()
+        if drift_monitor is not None:
+            drift_monitor.observe(patient)
+    if "patient" in st.session_state:
+        risk_report(st.session_state.patient)
+        what_if_panel(st.session_state.patient)
+
+
+def discard_file(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def read_once(path):
+    """Deferred download data: the file's bytes when clicked, deleting the file once read."""
+    def read():
+        with open(path, "rb") as file:
+            data = file.read()
+        discard_file(path)
+        return data
+    return read
+
+
+@st.fragment
+def batch_screening():
+    st.markdown("## 📂 Batch Screening Roster")
+    st.markdown("Upload a roster in the layout of `Cleaned Heart Attack Prediction Dataset.csv` "
+                "or the raw `Heart_Attack_Prediction_Dataset.csv` export to score every patient "
+                "and download the results.")
+
+    roster = st.file_uploader("Screening roster (CSV)", type="csv")
+
+    if roster is not None and st.button("📊 Score Roster", type="primary"):
+        if model is None:
+            st.error("❌ Model not loaded. Cannot perform assessment.")
+        else:
+            # Scored chunks go to disk as they are produced; the file is only read
+            # into memory when the download is clicked, and deleted once served
+            discard_file(st.session_state.pop("scored_roster", None))
+            scored_file = tempfile.NamedTemporaryFile("w+", suffix=".csv", newline="", delete=False)
+            try:
+                with st.spinner("🔄 Scoring roster..."), scored_file:
+                    progress = st.empty()
+                    for rows in score_csv(model, roster, scored_file):
+                        progress.caption(f"Scored {rows:,} patients")
+            except KeyError as e:
+                discard_file(scored_file.name)
+                st.error(f"❌ Roster is missing required column {e}.")
+            except ValueError as e:
+                discard_file(scored_file.name)
+                st.error(f"❌ Roster has invalid values: {e}.")
+            else:
+                st.session_state.scored_roster = scored_file.name
+                st.download_button("⬇️ Download Scored Roster", read_once(scored_file.name),
+                                   file_name="scored_roster.csv", mime="text/csv", on_click="ignore")
+                st.caption("The scored file can be downloaded once; score the roster again for another copy.")
+
+
+@st.fragment
+def cohort_analytics():
+    import pandas as pd
+
+    import cohort
+
+    st.markdown("## 👥 Cohort Analytics")
+    index = get_cohort_index()
+    if index is None:
+        st.error(f"⚠️ Dataset '{cohort.RAW_PATH}' not found. Cohort analytics are unavailable.")
+        return
+
+    patient = st.session_state.get("patient")
+    defaults = cohort.cohort_of(patient) if patient is not None else {}
+    st.markdown("Compare patients with the dataset population by country, continent, age band and sex."
+                + (" Filters start at the assessed patient's cohort." if defaults else ""))
+
+    def choose(column, label, options, key):
+        options = ["All"] + options
+        default = defaults.get(key)
+        value = column.selectbox(label, options, index=options.index(default) if default in options else 0)
+        return None if value == "All" else value
+
+    col1, col2, col3, col4 = st.columns(4)
+    continent = choose(col1, "Continent", sorted(index.values["Continent"]), "continent")
+    countries = sorted(c for c in index.values["Country"]
+                       if continent is None or COUNTRY_CONTINENTS.get(c) == continent)
+    country = choose(col2, "Country", countries, "country")
+    age_band = choose(col3, "Age Band", [b for b in cohort.AGE_BANDS if b in index.values["Age Band"]], "age_band")
+    sex = choose(col4, "Sex", sorted(index.values["Sex"]), "sex")
+    filters = {"country": country, "continent": continent, "age_band": age_band, "sex": sex}
+
+    summary = index.summary(**filters)
+    if summary is None:
+        st.info("No patients in the dataset match this cohort.")
+        return
+    overall = index.summary()
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Patients", f"{summary['count']:,}")
+    col2.metric("High-Risk Rate", f"{summary['risk_rate']:.1%}",
+                delta=f"{(summary['risk_rate'] - overall['risk_rate']) * 100:+.1f} pp vs all", delta_color="inverse")
+    col3.metric("Share of Dataset", f"{summary['count'] / overall['count']:.1%}")
+
+    measures = pd.DataFrame(summary["measures"]).T.rename(columns={
+        "mean": "Mean", "std": "Std Dev", "p10": "10th pct", "p50": "Median", "p90": "90th pct"})
+    if patient is not None:
+        measures.insert(0, "Patient", [float(np.asarray(patient[m])[0]) for m in measures.index])
+    st.markdown("#### Clinical Measures")
+    st.dataframe(measures.style.format("{:,.1f}"), width="stretch")
+
+    st.markdown("#### Condition Prevalence")
+    prevalence = pd.Series(summary["prevalence"], name="Prevalence") * 100
+    st.bar_chart(prevalence, horizontal=True, y_label="% of cohort")
+
+    # Drill down one level: the next open dimension, split by its values
+    drill = next((d for d, key in (("Continent", "continent"), ("Country", "country"), ("Age Band", "age_band"),
+                                   ("Sex", "sex")) if filters[key] is None), None)
+    if drill is not None:
+        breakdown = pd.DataFrame(index.breakdown(drill, **filters), columns=[drill, "Patients", "High-Risk Rate"])
+        if drill == "Age Band":
+            breakdown[drill] = pd.Categorical(breakdown[drill], cohort.AGE_BANDS, ordered=True)
+        st.markdown(f"#### High-Risk Rate by {drill}")
+        st.bar_chart(breakdown.set_index(drill)["High-Risk Rate"] * 100, y_label="% high risk")
+        st.dataframe(breakdown.style.format({"High-Risk Rate": "{:.1%}"}), hide_index=True, width="stretch")
+
+
+@st.fragment
+def input_drift():
+    import pandas as pd
+
+    import drift
+
+    drift_monitor = get_drift_monitor()
+
+    st.markdown("## 📡 Input Drift")
+    if drift_monitor is None:
+        st.error(f"⚠️ Reference profile '{drift.REFERENCE_PATH}' not found. Run `python drift.py reference` to build it.")
+        return
+    report = drift_monitor.report()
+    st.markdown(f"Assessed patients compared with the {report['reference_rows']:,} training records, feature by "
+                f"feature. PSI below {drift.PSI_MODERATE} is stable; above {drift.PSI_SIGNIFICANT} the inputs "
+                "have shifted significantly.")
+    if not report["rows"]:
+        st.info("No patients assessed yet in this server process.")
+        return
+
+    scores = pd.DataFrame(report["columns"]).set_index("column")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Patients Monitored", f"{report['rows']:,}")
+    col2.metric("Significant Shifts", int((scores["status"] == "significant").sum()))
+    col3.metric("Largest PSI", f"{scores['psi'].max():.3f}")
+    if report["rows"] < 100:
+        st.caption("Scores over fewer than 100 patients are dominated by sampling noise.")
+
+    st.bar_chart(scores["psi"].sort_values(ascending=False), horizontal=True, y_label="PSI")
+    st.dataframe(scores.rename(columns={"kind": "Kind", "rows": "Patients", "psi": "PSI", "ks": "KS",
+                                        "status": "Status"}).sort_values("PSI", ascending=False)
+                 .style.format({"PSI": "{:.4f}", "KS": "{:.3f}"}, na_rep="–"), width="stretch")
+
+    column = st.selectbox("Compare distributions", scores.index)
+    labels, expected, actual = drift_monitor.distribution(column)
+    st.bar_chart(pd.DataFrame({"Training": expected, "Assessed": actual}, index=pd.Index(labels, name=column)),
+                 stack=False, y_label="share of patients")
+
+    col1, col2, col3 = st.columns(3)
+    col1.download_button("⬇️ Drift Report (JSON)", json.dumps(report, indent=2), file_name="drift_report.json",
+                         mime="application/json", on_click="ignore")
+    col2.download_button("⬇️ Drift Scores (CSV)", scores.to_csv(), file_name="drift_scores.csv", mime="text/csv",
+                         on_click="ignore")
+    col3.button("↺ Reset Counts", on_click=drift_monitor.reset)
+
+
+# Only the selected tab runs, so a first page view does not build the cohort
+# index or import the analytics dependencies
+assess_tab, batch_tab, cohort_tab, drift_tab = st.tabs(["🩺 Individual Assessment", "📂 Batch Screening",
+                                                        "👥 Cohort Analytics", "📡 Input Drift"],
+                                                       key="section", on_change="rerun")
+
+with assess_tab:
+    if assess_tab.open:
+        patient_assessment()
+
+with batch_tab:
+    if batch_tab.open:
+        batch_screening()
+
+with cohort_tab:
+    if cohort_tab.open:
+        cohort_analytics()
+
+with drift_tab:
+    if drift_tab.open:
+        input_drift()
 
 # Footer
-st.markdown("---")
-st.markdown("""
+@st.cache_data
+def footer_html():
+    return """
 <div style='background-color: #eff6ff; padding: 25px; border-radius: 8px; margin-top: 30px;'>
     <h3 style='color: #1e40af; margin-top: 0;'>⚕️ Medical Disclaimer & Important Information</h3>
     <p style='color: #1e3a8a; line-height: 1.6;'>
@@ -440,4 +817,7 @@ st.markdown("""
     © 2025 Heart Disease Risk Assessment System | For Healthcare Professional & Educational Use
     </p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+"""
+
+st.markdown("---")
+st.markdown(footer_html(), unsafe_allow_html=True)
\ No newline at end of file
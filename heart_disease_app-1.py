@@ -1,7 +1,9 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import pickle
+
+from features import CATEGORIES, COUNTRIES, Vectorizer, widget_range
+from pipeline import add_derived_features
+import scoring
+import startup
 
 
 # Page setup
@@ -29,19 +31,18 @@ st.set_page_config(page_title="Heart Health Check", page_icon="❤️", layout="
     #</style>
     #""", unsafe_allow_html=True)
 
-# Load model
-@st.cache_resource
-def load_model():
-    with open("heart_model.pkl","rb") as file:
-       model = pickle.load(file)
-    return model
+# Load model, keyed on the published files' paths and mtimes so a newly
+# published version is picked up on the next rerun
+@st.cache_resource(max_entries=2)
+def load_model(source):
+    return startup.scorer(source)
+
+model = load_model(scoring.model_source())
 
-model = load_model()
 
-#Define function for prediction
-def predict_heart_disease(inputs):
-    prediction = model.predict([inputs])
-    return prediction[0]
+def limits(column):
+    low, high = widget_range(column)
+    return {"min_value": low, "max_value": high}
 
 # Sidebar info
 with st.sidebar:
@@ -62,68 +63,75 @@ st.markdown("### 📝 Enter your Health Details below:")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    Age = st.number_input("Age (Years):", min_value = 18, max_value = 90)
+    Age = st.number_input("Age (Years):", **limits("Age"))
     Sex = st.selectbox("Sex:", options= [0, 1], format_func=lambda x: "Female" if x == 0 else "Male", index = 1)
-    Cholesterol = st.number_input("Cholesterol (mg/dL):", min_value = 120, max_value = 400)
-    Heart = st.number_input("Heart Rate (bpm):", min_value = 40, max_value = 110)
+    Cholesterol = st.number_input("Cholesterol (mg/dL):", **limits("Cholesterol"))
+    Heart = st.number_input("Heart Rate (bpm):", **limits("Heart Rate"))
     Diabetes = int(st.selectbox("Diabetes:", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes"))
     Family = int(st.selectbox("Family History:", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes"))
     Smoking = int(st.selectbox("Smoking:",options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes"))
     Obesity = int(st.selectbox("Obesity:", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes"))
     Alcohol = int(st.selectbox("Alcohol Consumption:",options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes"))
-    Exercise = st.number_input("Exercise Hours Per Week (Hours/Week):", min_value = 0.002, max_value = 19.998)  
+    Exercise = st.number_input("Exercise Hours Per Week (Hours/Week):", **limits("Exercise Hours Per Week"))  
 
 with col2:  
-    Diet = st.selectbox("Diet:",options= [0, 1, 2], format_func = lambda x: ['Average', 'Healthly', 'Unhealthy'][x])
+    Diet = st.selectbox("Diet:", options=CATEGORIES["Diet"])
     Previous = int(st.selectbox("Previous Heart Problems:", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes"))
     Medication = int(st.selectbox("Medication Use:", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes"))
-    Level = st.number_input("Stress Level:", min_value = 1, max_value = 10)
-    Sedentary = st.number_input("Sedentary Hours Per Day (Hours/Day):", min_value = 0.001, max_value = 11.999)
-    Income = st.number_input("Income (USD/Year):", min_value = 20062, max_value = 299954)
-    BMI= st.number_input("BMI (kg/m):", min_value = 18.00, max_value = 39.99)
-    Triglycerides = st.number_input("Triglycerides (mg/dL):", min_value = 30, max_value = 800)
-    Activity = st.number_input("Physical Activity Days Per Week (Days/Week):", min_value = 0, max_value = 7)
-    Sleep = st.number_input("Sleep Hours Per Day (Hours/day):", min_value = 4, max_value = 10)
+    Level = st.number_input("Stress Level:", **limits("Stress Level"))
+    Sedentary = st.number_input("Sedentary Hours Per Day (Hours/Day):", **limits("Sedentary Hours Per Day"), value=8.0)
+    Income = st.number_input("Income (USD/Year):", **limits("Income"))
+    BMI= st.number_input("BMI (kg/m):", **limits("BMI"))
+    Triglycerides = st.number_input("Triglycerides (mg/dL):", **limits("Triglycerides"))
+    Activity = st.number_input("Physical Activity Days Per Week (Days/Week):", **limits("Physical Activity Days Per Week"))
+    Sleep = st.number_input("Sleep Hours Per Day (Hours/day):", **limits("Sleep Hours Per Day"))
 
 with col3:  
-    Country = st.selectbox ('Country:', ['Argentina', 'Australia', 'Brazil', 'Canada', 'China', 'Colombia', 'France', 'Germany', 'India', 'Italy',
-              'Japan', 'New Zealand', 'Nigeria', 'South Africa', 'South Korea', 'Spain' 'Thailand', 'United States', 'Vietnam'])
+    Country = st.selectbox('Country:', COUNTRIES)
     #Attack = st.selectbox("Heart Attack #Risk:", options=[0, 1], format_func=lambda x: #"No" if x == 0 else "Yes")
-    Systolic= st.number_input("Systolic Blood Pressure (mm Hg):", min_value = 90, max_value = 180)
-    Diastolic = st.number_input("Diastolic Blood Pressure (mm Hg):", min_value = 60, max_value = 110)
-    Stress = st.number_input("BMI Stress:", min_value = 18.00, max_value = 399.85)
-    Ratio = st.number_input("Activity Ratio:", min_value = 0.0005, max_value = 19.1768)
-    BP = st.number_input("Blood Presure Product mm Hg):", min_value = 5400, max_value = 19800)
-    Interaction = st.number_input("Sleep Stress Interaction:", min_value = 4, max_value = 100)
-    Substance = st.selectbox("Substance Use:", options=[0, 1], format_func=lambda x: "No" if x == 0 else "Yes")
-
-#Prepare input data 
+    Systolic= st.number_input("Systolic Blood Pressure (mm Hg):", **limits("Systolic_BP"))
+    Diastolic = st.number_input("Diastolic Blood Pressure (mm Hg):", **limits("Diastolic_BP"))
+
+#Prepare input data; the calculated columns come from the same pipeline used on the datasets
+patient = add_derived_features({
+    "Age": [Age], "Sex": [CATEGORIES["Sex"][Sex]], "Cholesterol": [Cholesterol], "Systolic_BP": [Systolic],
+    "Diastolic_BP": [Diastolic], "Heart Rate": [Heart], "Diabetes": [Diabetes], "Family History": [Family],
+    "Obesity": [Obesity], "Smoking": [Smoking], "Alcohol Consumption": [Alcohol], "Diet": [Diet],
+    "Previous Heart Problems": [Previous], "Medication Use": [Medication], "BMI": [BMI], "Stress Level": [Level],
+    "Sleep Hours Per Day": [Sleep], "Exercise Hours Per Week": [Exercise], "Sedentary Hours Per Day": [Sedentary],
+    "Income": [Income], "Triglycerides": [Triglycerides], "Physical Activity Days Per Week": [Activity],
+    "Country": [Country],
+})
+with col3:
+    st.metric("BMI Stress:", f"{patient['BMI_Stress'][0]:.2f}")
+    st.metric("Activity Ratio:", f"{patient['Activity_Ratio'][0]:.4f}")
+    st.metric("Blood Pressure Product (mm Hg):", f"{patient['By_Product'][0]:,}")
+    st.metric("Sleep Stress Interaction:", f"{patient['Sleep_Stress_Interaction'][0]}")
+
 if st.button('Predict Heart Disease Risk'):
    st.title("Prediction Result:")
-   inputs =[Age, Sex, Cholesterol, Heart, Diabetes, Family, Smoking, Obesity, Alcohol, Exercise]  
-   inputs = np.asarray(inputs).reshape(1, -1)
-   prediction = model.predict(inputs)
- 
-   prediction = model.predict([inputs])
-
-if prediction[0] == 1:
-    st.error("*HIGH RISK of Heart Disease! Please Consult a doctor immediately*")
-    st.markdown("### Preventive Measures:")
-    st.write("- Maintain a heart-healthy diet (low sodium, high fiber, low fat).")
-    st.write("- Stop smoking and limit alcohol intake.")
-    st.write("- Manage stress through relaxation or counseling.")
-    st.write("- Increase physical activity under doctor supervision.")
-    st.write("- Schedule regular checkups with a cardiologist.")
-    st.write("- Take prescribed medications consistently and monitor vitals.")
-else:
-    st.success("*LOW RISK of Heart Disease. Keep maintaining your healthy lifestyle!*")
-    st.markdown("### Continue Healthy Routine:")
-    st.write("- Continue eating a balanced and nutritious diet.")
-    st.write("- Stay well hydrated daily.")
-    st.write("- Maintain regular exercise habits.")
-    st.write("- Avoid smoking and reduce alcohol.")
-    st.write("- Get enough quality sleep every night.")
-    st.write("- Keep stress levels low with rest and mindfulness.")
+   inputs = st.session_state.setdefault("vectorizer", Vectorizer()).transform(patient)
+   prediction, _ = scoring.predict_risk(model, inputs, record=True)
+   startup.first_prediction()
+
+   if prediction[0] == 1:
+       st.error("*HIGH RISK of Heart Disease! Please Consult a doctor immediately*")
+       st.markdown("### Preventive Measures:")
+       st.write("- Maintain a heart-healthy diet (low sodium, high fiber, low fat).")
+       st.write("- Stop smoking and limit alcohol intake.")
+       st.write("- Manage stress through relaxation or counseling.")
+       st.write("- Increase physical activity under doctor supervision.")
+       st.write("- Schedule regular checkups with a cardiologist.")
+       st.write("- Take prescribed medications consistently and monitor vitals.")
+   else:
+       st.success("*LOW RISK of Heart Disease. Keep maintaining your healthy lifestyle!*")
+       st.markdown("### Continue Healthy Routine:")
+       st.write("- Continue eating a balanced and nutritious diet.")
+       st.write("- Stay well hydrated daily.")
+       st.write("- Maintain regular exercise habits.")
+       st.write("- Avoid smoking and reduce alcohol.")
+       st.write("- Get enough quality sleep every night.")
+       st.write("- Keep stress levels low with rest and mindfulness.")
 
 
  #Footer
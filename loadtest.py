@@ -0,0 +1,225 @@
+"""Open-loop load test of the scoring path with synthetic patients.
+
+Requests arrive on a Poisson schedule at each offered rate whether or not
+earlier ones have finished, as real traffic does, and every latency is
+measured from the request's scheduled arrival. A scorer that stalls
+therefore shows up in the tail instead of quietly slowing the load down.
+--concurrency workers pick up the arrivals in order, so when all of them
+are busy, requests queue and the wait counts toward their latency. A rate
+of 0 runs closed-loop instead: every worker sends back to back, which gives
+the saturation throughput.
+
+Targets are the model's predict path in this process (`model`), the
+service's micro-batcher in this process (`batcher`), or a running
+service.py given by its URL. Patients come from synth.py, or from --data.
+
+    python loadtest.py --rates 200 500 1000 0 --concurrency 8 --duration 10
+    python loadtest.py --target http://127.0.0.1:8000 --rates 100 200 400 --plot latency.png
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+
+import numpy as np
+
+from features import INPUT_COLUMNS, model_matrix
+
+PERCENTILES = [50, 90, 99, 99.9]
+POOL_ROWS = 100_000
+
+
+def patient_pool(rows=POOL_ROWS, data=None, seed=0):
+    """Cleaned-layout patients to replay: a CSV, or `rows` synthetic ones."""
+    import pandas as pd
+
+    if data:
+        from pipeline import clean, is_raw
+
+        frame = pd.read_csv(data, nrows=rows)
+        return clean(frame) if is_raw(frame) else frame
+    from synth import load_synthesizer
+
+    return load_synthesizer().sample(rows, np.random.default_rng(seed))
+
+
+def _check_batch_rows(frame, batch_rows):
+    if not 1 <= batch_rows <= len(frame):
+        raise ValueError(f"batch rows must be between 1 and the {len(frame):,} patients in the pool, not {batch_rows:,}")
+
+
+def model_sender(frame, batch_rows, batcher=False, model_path=None, tier="auto"):
+    """send(i) scoring the i-th batch of `frame` in this process, directly or through a MicroBatcher."""
+    from scoring import load_scorer, predict_risk
+    from startup import prewarm
+
+    _check_batch_rows(frame, batch_rows)
+    model = prewarm(load_scorer(model_path, tier))
+    X = model_matrix(frame)
+    batches = len(X) // batch_rows
+    if batcher:
+        from service import MicroBatcher
+
+        micro_batcher = MicroBatcher(model)
+
+        def send(i):
+            start = (i % batches) * batch_rows
+            micro_batcher.submit(X[start:start + batch_rows]).result(timeout=10)
+    else:
+        def send(i):
+            start = (i % batches) * batch_rows
+            predict_risk(model, X[start:start + batch_rows])
+    return send
+
+
+def http_sender(frame, batch_rows, url):
+    """send(i) POSTing the i-th batch of `frame` to a running service's /predict."""
+    import http.client
+    from urllib.parse import urlsplit
+
+    _check_batch_rows(frame, batch_rows)
+    target = urlsplit(url)
+    path = (target.path.rstrip("/") or "") + "/predict" + (f"?{target.query}" if target.query else "")
+    records = frame[INPUT_COLUMNS].to_dict("records")
+    bodies = [json.dumps({"patients": records[start:start + batch_rows]}).encode()
+              for start in range(0, len(records) - batch_rows + 1, batch_rows)]
+
+    def send(i):
+        # The service answers HTTP/1.0, one connection per request
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=10)
+        try:
+            connection.request("POST", path, bodies[i % len(bodies)], {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+        finally:
+            connection.close()
+    return send
+
+
+def run_rate(send, rate, duration, concurrency, seed=0):
+    """Drive `send` at `rate` requests/s (0: closed-loop) for `duration` seconds; returns its summary."""
+    if rate > 0:
+        gaps = np.random.default_rng(seed).exponential(1 / rate, int(rate * duration * 1.2) + 16)
+        arrivals = np.cumsum(gaps)
+        arrivals = arrivals[arrivals < duration]
+    else:
+        arrivals = None
+    counter = itertools.count()
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    start = time.perf_counter() + 0.05
+
+    def worker(w):
+        while True:
+            i = next(counter)
+            if arrivals is not None:
+                if i >= len(arrivals):
+                    return
+                scheduled = start + arrivals[i]
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+                if scheduled - start >= duration:
+                    return
+            try:
+                send(i)
+            except Exception:
+                errors[w] += 1
+                continue
+            latencies[w].append(time.perf_counter() - scheduled)
+
+    threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    done = np.concatenate([np.array(samples) for samples in latencies]) * 1e3
+    percentiles = np.percentile(done, PERCENTILES) if len(done) else [None] * len(PERCENTILES)
+    return {
+        "offered_rps": rate or None,
+        "requests": len(done) + sum(errors),
+        "errors": sum(errors),
+        "throughput_rps": len(done) / elapsed,
+        "latency_ms": {**{f"p{p:g}": float(v) if v is not None else None for p, v in zip(PERCENTILES, percentiles)},
+                       "max": float(done.max()) if len(done) else None},
+    }
+
+
+def plot(results, path):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    open_loop = [r for r in results if r["offered_rps"]]
+    fig, ax = plt.subplots(figsize=(7, 4))
+    for p in PERCENTILES:
+        ax.plot([r["throughput_rps"] for r in open_loop], [r["latency_ms"][f"p{p:g}"] for r in open_loop],
+                marker="o", label=f"p{p:g}")
+    ax.set_xlabel("throughput (requests/s)")
+    ax.set_ylabel("latency (ms)")
+    ax.set_yscale("log")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test of the scoring path.")
+    parser.add_argument("--target", default="model", help="'model', 'batcher' or a service URL")
+    parser.add_argument("--rates", type=float, nargs="+", default=[100, 250, 500, 1000, 0],
+                        help="offered requests/s, one run each (0: closed-loop saturation)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per rate")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at most")
+    parser.add_argument("--batch-rows", type=int, default=1, help="patients per request")
+    parser.add_argument("--data", help="CSV of patients to replay instead of synthetic ones")
+    parser.add_argument("--pool-rows", type=int, default=POOL_ROWS, help="distinct patients to cycle through")
+    parser.add_argument("--model", help="model file for in-process targets (defaults to the published model)")
+    parser.add_argument("--tier", choices=["auto", "full"], default="auto")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--plot", help="write a latency-throughput chart (PNG)")
+    args = parser.parse_args()
+
+    if args.batch_rows < 1:
+        parser.error("--batch-rows must be at least 1")
+    frame = patient_pool(args.pool_rows, args.data, args.seed)
+    if args.batch_rows > len(frame):
+        parser.error(f"--batch-rows {args.batch_rows:,} exceeds the {len(frame):,} patients in the pool; "
+                     "raise --pool-rows or pass a larger --data")
+    if args.target in ("model", "batcher"):
+        send = model_sender(frame, args.batch_rows, args.target == "batcher", args.model, args.tier)
+    else:
+        send = http_sender(frame, args.batch_rows, args.target)
+
+    results = []
+    print(f"{'offered/s':>10} {'achieved/s':>11} {'errors':>7} "
+          + " ".join(f"{f'p{p:g} ms':>9}" for p in PERCENTILES) + f" {'max ms':>9}")
+    for rate in args.rates:
+        result = run_rate(send, rate, args.duration, args.concurrency, args.seed)
+        results.append(result)
+        latency = result["latency_ms"]
+        offered = f"{rate:,.0f}" if rate else "closed"
+        print(f"{offered:>10} {result['throughput_rps']:>11,.0f} {result['errors']:>7,} "
+              + " ".join(f"{latency[f'p{p:g}']:>9.2f}" if latency[f"p{p:g}"] is not None else f"{'-':>9}"
+                         for p in PERCENTILES)
+              + (f" {latency['max']:>9.2f}" if latency["max"] is not None else f" {'-':>9}"), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"target": args.target, "concurrency": args.concurrency, "batch_rows": args.batch_rows,
+                       "duration": args.duration, "results": results}, file, indent=2)
+    if args.plot:
+        plot(results, args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Lightweight instrumentation for the prediction path.
+
+Counters and fixed-bucket histograms live in one process-wide registry,
+`METRICS`. Recording is a dictionary update under a lock, cheap enough to
+stay on in production. The registry renders in the Prometheus text format,
+and `log_event` writes one JSON object per line to the "heart.metrics"
+logger.
+
+    with METRICS.time("predict_proba"):
+        ...
+    METRICS.inc("heart_predictions_total")
+    print(METRICS.render())
+"""
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("heart.metrics")
+
+# Seconds; spans single-row scoring (~0.1 ms) to large batches
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "heart_predictions_total": "Patients scored.",
+    "heart_prediction_errors_total": "Scoring attempts that raised an error.",
+    "heart_prediction_outcomes_total": "Scored patients by predicted risk.",
+    "heart_stage_seconds": "Time spent in each stage of the prediction path.",
+    "heart_prediction_seconds": "End-to-end latency of one scoring request.",
+    "heart_tier_rows_total": "Served rows answered by the fast tier or escalated to the full model.",
+    "heart_model_seconds": "Scoring time per batch of the primary and each shadow model.",
+    "heart_shadow_rows_total": "Rows scored by a shadow model, by agreement with the primary.",
+    "heart_shadow_skipped_total": "Batches a shadow model skipped because the shadow pool was backlogged.",
+    "heart_startup_seconds": "Time spent in each startup phase (imports, model load, pre-warm).",
+    "heart_time_to_first_prediction_seconds": "Time from process start to the first prediction served.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, stage, stages=None):
+        """Record the duration of the enclosed block under heart_stage_seconds{stage}.
+
+        If a `stages` dict is given, the duration is also stored in it under
+        the stage name, for the request's structured log line.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe("heart_stage_seconds", elapsed, stage=stage)
+            if stages is not None:
+                stages[stage] = round(elapsed, 6)
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            histograms = [(key, list(h.counts), h.total, h.count, h.buckets) for key, h in histograms]
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), counts, total, count, buckets in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def log_event(event, **fields):
+    """Write one structured log line; a no-op unless the logger is enabled for INFO."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str))
+
+
+def configure_logging(level="INFO"):
+    """Send the structured log lines to stderr at `level`, for processes that do not configure logging themselves."""
+    if not any(getattr(handler, "heart_metrics", False) for handler in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.heart_metrics = True
+        logger.addHandler(handler)
+        # Lines are written here once; the root logger may not be configured at all
+        logger.propagate = False
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def record_prediction(labels, seconds, stages=None):
+    """Count a scoring request of one or more patients and log it."""
+    METRICS.observe("heart_prediction_seconds", seconds)
+    METRICS.inc("heart_predictions_total", len(labels))
+    high = int(sum(1 for label in labels if label == 1))
+    if high:
+        METRICS.inc("heart_prediction_outcomes_total", high, risk="high")
+    if len(labels) - high:
+        METRICS.inc("heart_prediction_outcomes_total", len(labels) - high, risk="low")
+    log_event("prediction", patients=len(labels), high_risk=high, seconds=round(seconds, 6),
+              **({"stages": stages} if stages else {}))
+
+
+def record_error(error, stage=None):
+    METRICS.inc("heart_prediction_errors_total", stage=stage or "unknown")
+    logger.error(json.dumps({"event": "prediction_error", "ts": round(time.time(), 3), "stage": stage,
+                             "error": f"{type(error).__name__}: {error}"}))
+
+
+def start_http_server(port, host="0.0.0.0"):
+    """Serve METRICS.render() at /metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            data = METRICS.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,164 @@
+"""Incremental model updates from newly labelled assessments.
+
+The online model is a logistic-loss SGDClassifier. Each batch of labelled
+rows (cleaned or raw layout) is one partial_fit pass over that batch only,
+so an update costs time in proportion to the batch, not to the history.
+The updated model is published as a new versioned artifact in models/:
+the file is written under a temporary name and renamed into place, then
+models/CURRENT is replaced the same way to point at it. Readers therefore
+see either the old version or the new one, never a partial file, and the
+apps and service pick the new version up on their next model check.
+
+Training state lives in the published artifact itself (coefficients and
+the step-size counter), so each update resumes from the current version.
+
+    python online.py bootstrap                       # first version, from the cleaned dataset
+    python online.py update confirmed_outcomes.csv   # fold in newly labelled rows
+    python online.py status
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from features import model_matrix
+from pipeline import clean, is_raw
+from scoring import CURRENT_POINTER, MODELS_DIR, default_model_path
+
+CLEANED_PATH = "Cleaned Heart Attack Prediction Dataset.csv"
+TARGET = "Heart Attack Risk"
+CLASSES = np.array([0, 1])
+CHUNK_ROWS = 10_000
+# Published versions kept on disk; older ones are pruned after each publish
+KEEP_VERSIONS = 5
+
+
+def new_learner(seed=0):
+    from sklearn.linear_model import SGDClassifier
+
+    return SGDClassifier(loss="log_loss", alpha=1e-4, random_state=seed)
+
+
+def current_learner():
+    """The currently published online model, ready for partial_fit, or None."""
+    from artifact import read_header
+    from scoring import load_model
+
+    if not os.path.exists(CURRENT_POINTER):
+        return None
+    path = default_model_path()
+    if read_header(path)["params"].get("estimator") != "SGDClassifier":
+        return None
+    model = load_model(path)
+    # The loaded coefficients are read-only maps of the artifact
+    model.coef_ = np.array(model.coef_)
+    model.intercept_ = np.array(model.intercept_)
+    return model
+
+
+def labelled_rows(frame):
+    """(model matrix, labels) for a batch of labelled rows in either layout."""
+    features = clean(frame) if is_raw(frame) else frame
+    return model_matrix(features), np.asarray(frame[TARGET], dtype=np.int64)
+
+
+def update(model, frame):
+    """One partial_fit pass over a labelled batch; returns the model."""
+    X, y = labelled_rows(frame)
+    model.partial_fit(X, y, classes=CLASSES)
+    return model
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def publish(model, directory=MODELS_DIR, keep=KEEP_VERSIONS):
+    """Write `model` as a new version and point models/CURRENT at it; returns the version."""
+    from artifact import export_model
+
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, f".staging{os.getpid()}.bin")
+    version = export_model(model, staging)
+    name = f"heart_model-{version}.bin"
+    os.replace(staging, os.path.join(directory, name))
+
+    def write_pointer(path):
+        with open(path, "w") as pointer:
+            pointer.write(name + "\n")
+    _write_atomic(os.path.join(directory, "CURRENT"), write_pointer)
+
+    # Prune the oldest versions; a reader holding one open keeps its mapping
+    versions = sorted((entry for entry in os.scandir(directory)
+                       if entry.name.startswith("heart_model-") and entry.name != name),
+                      key=lambda entry: entry.stat().st_mtime_ns)
+    for entry in versions[:max(0, len(versions) - (keep - 1))]:
+        os.remove(entry.path)
+    return version
+
+
+def bootstrap(data_path=CLEANED_PATH, epochs=5, seed=0):
+    """Train the first online model by streaming the dataset through partial_fit."""
+    import pandas as pd
+
+    model = new_learner(seed)
+    frame = pd.read_csv(data_path)
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        shuffled = frame.iloc[rng.permutation(len(frame))]
+        for start in range(0, len(shuffled), CHUNK_ROWS):
+            update(model, shuffled.iloc[start:start + CHUNK_ROWS])
+    return model
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Update and publish the online model from labelled rows.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    start = commands.add_parser("bootstrap", help="train and publish a first online model")
+    start.add_argument("--data", default=CLEANED_PATH)
+    start.add_argument("--epochs", type=int, default=5)
+    batch = commands.add_parser("update", help="fold labelled CSVs into the current online model")
+    batch.add_argument("csv", nargs="+", help="labelled rows in the cleaned or raw layout")
+    batch.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    commands.add_parser("status", help="show the published model")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        from artifact import read_header
+
+        path = default_model_path()
+        header = read_header(path) if path.endswith(".bin") else {}
+        print(f"{path}: {header.get('kind', 'pickle')} model, version {header.get('model_version', 'n/a')}")
+        return
+
+    rows = 0
+    if args.command == "bootstrap":
+        started = time.perf_counter()
+        model = bootstrap(args.data, args.epochs)
+    else:
+        model = current_learner()
+        if model is None:
+            parser.error("no online model is published yet; run 'python online.py bootstrap' first")
+        started = time.perf_counter()
+        for path in args.csv:
+            for chunk in pd.read_csv(path, chunksize=args.chunk_rows):
+                update(model, chunk)
+                rows += len(chunk)
+    trained = time.perf_counter() - started
+    version = publish(model)
+    print(f"Published version {version} to {CURRENT_POINTER}"
+          + (f" after {rows:,} new rows" if rows else "")
+          + f" (train {trained * 1e3:.0f} ms, publish {(time.perf_counter() - started - trained) * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Registry of named model versions, scored in shadow next to the primary.
+
+Each registered model is loaded on first use and dropped again after
+`idle_seconds` without traffic, so a registry can list many candidates
+while only the ones receiving traffic stay in memory. Shadow models see
+every batch the primary scores: `shadow()` hands the batch and the
+primary's answers to a thread pool and returns at once, so the response
+never waits on a shadow. Each shadow's agreement with the primary and its
+latency are recorded per model, in `stats()` and in METRICS.
+
+If the shadows fall behind, batches beyond `max_pending` in flight are
+skipped (and counted) rather than queued without bound.
+
+    registry = ModelRegistry()
+    registry.register("candidate", "candidate.bin", shadow=True)
+    registry.shadow(X, labels, high_risk)
+
+    python registry.py replay candidate.bin other.pkl   # replay the dataset and compare
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from metrics import METRICS, record_error
+from scoring import load_scorer, predict_risk
+
+IDLE_SECONDS = 600
+# Recent latencies kept per model for percentiles
+LATENCY_WINDOW = 2048
+
+
+class RegisteredModel:
+    def __init__(self, name, path=None, tier="full", shadow=False):
+        self.name = name
+        self.path = path
+        self.tier = tier
+        self.is_shadow = shadow
+        self.model = None
+        self.last_used = 0.0
+        self.loads = 0
+        self.evictions = 0
+        self.batches = 0
+        self.rows = 0
+        self.agreed = 0
+        self.probability_gap = 0.0
+        self.skipped = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1e3
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (None,) * 3
+        return {
+            "path": self.path,
+            "shadow": self.is_shadow,
+            "loaded": self.model is not None,
+            "model_version": getattr(self.model, "model_version", None),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "batches": self.batches,
+            "rows": self.rows,
+            "agreement": self.agreed / self.rows if self.is_shadow and self.rows else None,
+            "mean_probability_gap": self.probability_gap / self.rows if self.is_shadow and self.rows else None,
+            "latency_ms": {"p50": p50, "p95": p95, "p99": p99},
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, idle_seconds=IDLE_SECONDS, workers=2, max_pending=64):
+        self.idle_seconds = idle_seconds
+        self.max_pending = max_pending
+        self._models = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shadow")
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._primary = RegisteredModel("primary")
+        if idle_seconds:
+            threading.Thread(target=self._reap, name="registry-reaper", daemon=True).start()
+
+    def register(self, name, path=None, tier="full", shadow=False):
+        """Add a model by name; path=None means the default (published) model. Nothing is loaded yet."""
+        if name in self._models or name == "primary":
+            raise ValueError(f"model {name!r} is already registered")
+        self._models[name] = RegisteredModel(name, path, tier, shadow)
+
+    def names(self):
+        return list(self._models)
+
+    def get(self, name):
+        """The loaded model registered as `name`, loading it on first use."""
+        entry = self._models[name]
+        with entry.lock:
+            entry.last_used = time.monotonic()
+            if entry.model is None:
+                entry.model = load_scorer(entry.path, entry.tier)
+                entry.loads += 1
+            return entry.model
+
+    def score(self, name, X):
+        """predict_risk with the model registered as `name`, recording its latency."""
+        model = self.get(name)
+        start = time.perf_counter()
+        result = predict_risk(model, X, record=True)
+        self._record(self._models[name], len(X), time.perf_counter() - start)
+        return result
+
+    def evict_idle(self, now=None):
+        """Unload models unused for idle_seconds; returns their names."""
+        now = time.monotonic() if now is None else now
+        evicted = []
+        for entry in self._models.values():
+            with entry.lock:
+                if entry.model is not None and now - entry.last_used >= self.idle_seconds:
+                    entry.model = None
+                    entry.evictions += 1
+                    evicted.append(entry.name)
+        return evicted
+
+    def _reap(self):
+        while True:
+            time.sleep(max(self.idle_seconds / 4, 1.0))
+            self.evict_idle()
+
+    def shadow(self, X, labels, high_risk, primary_seconds=None):
+        """Score a batch the primary has answered on every shadow model, in the background."""
+        if primary_seconds is not None:
+            self._record(self._primary, len(X), primary_seconds)
+        for entry in self._models.values():
+            if not entry.is_shadow:
+                continue
+            if not self._pending.acquire(blocking=False):
+                with entry.lock:
+                    entry.skipped += 1
+                METRICS.inc("heart_shadow_skipped_total", model=entry.name)
+                continue
+            future = self._pool.submit(self._score_shadow, entry, X, labels, high_risk)
+            future.add_done_callback(lambda _: self._pending.release())
+
+    def _score_shadow(self, entry, X, labels, high_risk):
+        try:
+            model = self.get(entry.name)
+            start = time.perf_counter()
+            shadow_labels, shadow_risk = predict_risk(model, X)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            with entry.lock:
+                entry.errors += 1
+            record_error(e, f"shadow:{entry.name}")
+            return
+        agreed = int(np.count_nonzero(shadow_labels == labels))
+        with entry.lock:
+            entry.agreed += agreed
+            entry.probability_gap += float(np.abs(shadow_risk - high_risk).sum())
+        self._record(entry, len(X), elapsed)
+        if agreed:
+            METRICS.inc("heart_shadow_rows_total", agreed, model=entry.name, outcome="agree")
+        if len(X) - agreed:
+            METRICS.inc("heart_shadow_rows_total", len(X) - agreed, model=entry.name, outcome="disagree")
+
+    def _record(self, entry, rows, seconds):
+        with entry.lock:
+            entry.batches += 1
+            entry.rows += rows
+            entry.latencies.append(seconds)
+        METRICS.observe("heart_model_seconds", seconds, model=entry.name)
+
+    def stats(self):
+        primary = self._primary.stats()
+        return {"primary": {key: primary[key] for key in ("batches", "rows", "latency_ms")},
+                **{name: entry.stats() for name, entry in self._models.items()}}
+
+    def close(self, wait=True):
+        """Stop the shadow pool, by default after the batches in flight finish."""
+        self._pool.shutdown(wait=wait)
+
+
+def parse_spec(spec):
+    """'name=path' or a bare path (named after its file) -> (name, path)."""
+    name, _, path = spec.rpartition("=")
+    return name or os.path.splitext(os.path.basename(path))[0], path
+
+
+def main():
+    import pandas as pd
+
+    from features import model_matrix
+
+    parser = argparse.ArgumentParser(description="Replay the dataset through the primary model and shadow candidates.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay = commands.add_parser("replay", help="compare candidates with the primary on dataset rows")
+    replay.add_argument("shadows", nargs="+", help="candidate model files, as path or name=path")
+    replay.add_argument("--data", default="Cleaned Heart Attack Prediction Dataset.csv")
+    replay.add_argument("--batch-rows", type=int, default=1, help="rows per simulated request")
+    replay.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    X = model_matrix(pd.read_csv(args.data))
+    primary = load_scorer()
+    registry = ModelRegistry(idle_seconds=0)
+    for spec in args.shadows:
+        registry.register(*parse_spec(spec), shadow=True)
+
+    rows = np.random.default_rng(0).integers(0, len(X), (args.requests, args.batch_rows))
+    answered = []
+    for batch in rows:
+        start = time.perf_counter()
+        labels, high_risk = predict_risk(primary, X[batch])
+        elapsed = time.perf_counter() - start
+        answered.append(elapsed)
+        registry.shadow(X[batch], labels, high_risk, elapsed)
+    registry.close()
+
+    print(f"{args.requests:,} requests of {args.batch_rows} row(s); primary answered in "
+          f"{np.percentile(answered, 50) * 1e3:.3f} ms p50, {np.percentile(answered, 99) * 1e3:.3f} ms p99")
+    print(f"{'model':<20} {'rows':>8} {'agree':>7} {'|Δp|':>7} {'p50 ms':>8} {'p99 ms':>8} {'skipped':>8}")
+    for name, stats in registry.stats().items():
+        latency = stats["latency_ms"]
+        agreement = f"{stats['agreement']:.1%}" if stats.get("agreement") is not None else "-"
+        gap = f"{stats['mean_probability_gap']:.3f}" if stats.get("mean_probability_gap") is not None else "-"
+        p50 = f"{latency['p50']:.3f}" if latency["p50"] is not None else "-"
+        p99 = f"{latency['p99']:.3f}" if latency["p99"] is not None else "-"
+        print(f"{name:<20} {stats['rows']:>8,} {agreement:>7} {gap:>7} {p50:>8} {p99:>8} {stats.get('skipped', 0):>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Out-of-core, multi-process scoring of large patient extracts.
+
+The input CSV (raw Heart_Attack_Prediction_Dataset.csv or cleaned layout)
+is cut into byte ranges of about --chunk-mb each, aligned to line ends.
+Worker processes each load the model once, then parse, clean and score
+whole chunks on their own, so the parent only hands out offsets and
+writes results; throughput scales with the number of workers until the
+disk is the limit. Scored chunks are appended to the output in input
+order with the same columns as the app's batch tab (the input columns
+plus Risk Probability and Predicted Risk).
+
+After each chunk is written the output is flushed and a checkpoint
+(<output>.checkpoint) records how far it got. A rerun with the same
+arguments and model truncates any partial write and resumes at the next chunk;
+the checkpoint records the model version, so a resume refuses another model.
+Fields must not contain embedded newlines, which holds for both layouts.
+
+    python rescore.py Heart_Attack_Prediction_Dataset.csv scored.csv --jobs 8
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_MB = 32
+
+# Worker-side model, loaded once per process by _init_worker
+_MODEL = None
+
+
+def chunk_offsets(path, chunk_bytes):
+    """(header bytes, [(start, end), ...]) byte ranges of whole lines after the header."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        header = file.readline()
+        offsets = [file.tell()]
+        while offsets[-1] < size:
+            file.seek(min(offsets[-1] + chunk_bytes, size))
+            file.readline()
+            offsets.append(min(file.tell(), size))
+    return header, list(zip(offsets, offsets[1:]))
+
+
+def _init_worker(model_path, tier):
+    global _MODEL
+    from scoring import load_scorer
+
+    _MODEL = load_scorer(model_path, tier)
+
+
+def _score_chunk(path, header, start, end, first):
+    """Parse, clean and score one byte range; runs in a worker process. Returns (rows, CSV bytes)."""
+    import pandas as pd
+
+    from scoring import score_frame
+
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    frame = pd.read_csv(io.BytesIO(header + data))
+    try:
+        scored = score_frame(_MODEL, frame)
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"rows in bytes {start}-{end}: {e}") from None
+    return len(frame), scored.to_csv(index=False, header=first).encode()
+
+
+class Checkpoint:
+    """Progress of one run, rewritten atomically after every chunk."""
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.chunks = 0
+        self.rows = 0
+        self.output_bytes = 0
+
+    def load(self):
+        """Resume state from an earlier run of the same job; False if there is none."""
+        try:
+            with open(self.path) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return False
+        previous = state["fingerprint"]
+        if previous != self.fingerprint:
+            if previous.get("model_version") not in (None, self.fingerprint["model_version"]):
+                raise ValueError(f"{self.path} was scored by model {previous.get('model_version')} "
+                                 f"({previous.get('model')}), not {self.fingerprint['model_version']}; "
+                                 "pass that --model to finish with it, or --restart")
+            raise ValueError(f"{self.path} belongs to a different input, chunk size or model; "
+                             "delete it or pass --restart")
+        self.chunks, self.rows, self.output_bytes = state["chunks"], state["rows"], state["output_bytes"]
+        return True
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as file:
+            json.dump({"fingerprint": self.fingerprint, "chunks": self.chunks, "rows": self.rows,
+                       "output_bytes": self.output_bytes}, file)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    def __init__(self, total_bytes, done_bytes=0, rows=0, stream=sys.stderr, interval=1.0):
+        self.total_bytes = total_bytes
+        self.start_bytes = done_bytes
+        self.done_bytes = done_bytes
+        self.rows = rows
+        self.start_rows = rows
+        self.stream = stream
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._shown = 0.0
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return (self.rows - self.start_rows) / elapsed if elapsed else 0.0
+
+    def update(self, rows, chunk_bytes, force=False):
+        self.rows += rows
+        self.done_bytes += chunk_bytes
+        now = time.perf_counter()
+        if not force and now - self._shown < self.interval:
+            return
+        self._shown = now
+        elapsed = now - self.started
+        fraction = self.done_bytes / self.total_bytes if self.total_bytes else 1.0
+        byte_rate = (self.done_bytes - self.start_bytes) / elapsed if elapsed else 0.0
+        eta = (self.total_bytes - self.done_bytes) / byte_rate if byte_rate else float("inf")
+        self.stream.write(f"\r{fraction:6.1%}  {self.rows:>12,} rows  {self.rate():>10,.0f} rows/s  "
+                          f"ETA {_duration(eta)}   ")
+        self.stream.flush()
+
+
+def _duration(seconds):
+    if seconds == float("inf"):
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def rescore(source, destination, model_path=None, tier="auto", jobs=None, chunk_mb=CHUNK_MB,
+            restart=False, progress=True):
+    """Score `source` into `destination`, resuming from its checkpoint.
+
+    Returns (total rows, rows scored by this run, seconds).
+    """
+    from scoring import default_model_path, load_scorer
+
+    jobs = jobs or os.cpu_count()
+    # Pin the model so a publish mid-run cannot switch the workers to another one,
+    # and record its version so a resume cannot mix two models in one output
+    model_path = model_path or default_model_path()
+    model_version = getattr(load_scorer(model_path, tier), "model_version", None)
+    header, ranges = chunk_offsets(source, int(chunk_mb * 2**20))
+    stat = os.stat(source)
+    checkpoint = Checkpoint(f"{destination}.checkpoint",
+                            {"source": os.path.abspath(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                             "chunk_bytes": int(chunk_mb * 2**20), "model": model_path, "model_version": model_version,
+                             "tier": tier})
+    if restart:
+        checkpoint.remove()
+    resumed = checkpoint.load() and os.path.exists(destination)
+    if not resumed:
+        checkpoint.chunks = checkpoint.rows = checkpoint.output_bytes = 0
+    resumed_rows = checkpoint.rows
+
+    done_bytes = ranges[checkpoint.chunks - 1][1] - ranges[0][0] if checkpoint.chunks else 0
+    report = Progress(ranges[-1][1] - ranges[0][0] if ranges else 0, done_bytes, checkpoint.rows,
+                      stream=sys.stderr if progress else io.StringIO())
+    started = time.perf_counter()
+    with open(destination, "r+b" if resumed else "wb") as out:
+        # Drop anything written after the last checkpoint
+        out.truncate(checkpoint.output_bytes)
+        out.seek(checkpoint.output_bytes)
+        pending = {}
+        todo = iter(range(checkpoint.chunks, len(ranges)))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(model_path, tier)) as pool:
+            # Keep a bounded number of chunks in flight so finished results cannot pile up
+            def submit():
+                index = next(todo, None)
+                if index is not None:
+                    start, end = ranges[index]
+                    pending[index] = pool.submit(_score_chunk, source, header, start, end, index == 0)
+
+            for _ in range(2 * jobs):
+                submit()
+            try:
+                while checkpoint.chunks < len(ranges):
+                    rows, data = pending.pop(checkpoint.chunks).result()
+                    submit()
+                    out.write(data)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    start, end = ranges[checkpoint.chunks]
+                    checkpoint.chunks += 1
+                    checkpoint.rows += rows
+                    checkpoint.output_bytes += len(data)
+                    checkpoint.save()
+                    report.update(rows, end - start, force=checkpoint.chunks == len(ranges))
+            except BaseException:
+                for future in pending.values():
+                    future.cancel()
+                raise
+    if progress:
+        sys.stderr.write("\n")
+    checkpoint.remove()
+    return checkpoint.rows, checkpoint.rows - resumed_rows, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large raw- or cleaned-layout CSV with a process pool.")
+    parser.add_argument("source", help="CSV in the Heart_Attack_Prediction_Dataset.csv or cleaned layout")
+    parser.add_argument("destination", help="scored CSV to write")
+    parser.add_argument("--model", help="model file (defaults to the published model, the artifact, then the pickle)")
+    parser.add_argument("--tier", choices=["auto", "full"], default="auto")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_MB, help="input megabytes per chunk")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--quiet", action="store_true", help="no progress line")
+    args = parser.parse_args()
+
+    try:
+        rows, new_rows, seconds = rescore(args.source, args.destination, args.model, args.tier, args.jobs, args.chunk_mb,
+                                args.restart, progress=not args.quiet)
+    except ValueError as e:
+        parser.exit(1, f"\n{parser.prog}: {e}\n")
+    resumed = f" ({rows - new_rows:,} from an earlier run)" if new_rows < rows else ""
+    print(f"Scored {rows:,} rows into {args.destination}{resumed}; {new_rows:,} in {seconds:.1f} s "
+          f"({new_rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
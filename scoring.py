@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+
+from features import model_matrix
+from pipeline import clean, is_raw
+
+MODEL_PATH = "heart_model.pkl"
+ARTIFACT_PATH = "heart_model.bin"
+# Published model versions, and the file naming the current one
+MODELS_DIR = "models"
+# Generated by distill.py, so kept with the other generated models
+FAST_ARTIFACT_PATH = os.path.join(MODELS_DIR, "heart_model_fast.bin")
+CURRENT_POINTER = os.path.join(MODELS_DIR, "CURRENT")
+CHUNK_ROWS = 50_000
+
+
+def default_model_path():
+    """The published model named by models/CURRENT, else the artifact, else the pickle."""
+    try:
+        with open(CURRENT_POINTER) as pointer:
+            return os.path.join(MODELS_DIR, pointer.read().strip())
+    except FileNotFoundError:
+        return ARTIFACT_PATH if os.path.exists(ARTIFACT_PATH) else MODEL_PATH
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def model_source():
+    """(path, modification time, fast tier modification time) of the default model.
+
+    Changes whenever a new model or fast tier is published.
+    """
+    path = default_model_path()
+    return path, _mtime(path), _mtime(FAST_ARTIFACT_PATH)
+
+
+def load_model(path=None):
+    """Load a model: the published version if any, then the memory-mapped artifact, then the pickle."""
+    if path is None:
+        path = default_model_path()
+    if not path.endswith(".pkl"):
+        from artifact import load_artifact
+
+        return load_artifact(path)
+    with open(path, "rb") as file:
+        data = file.read()
+    model = pickle.loads(data)
+    # Content hash, matching how artifacts are versioned
+    model.model_version = hashlib.sha256(data).hexdigest()[:12]
+    return model
+
+
+def _engine(model):
+    name = type(model).__name__
+    if name == "KNeighborsClassifier":
+        from engine import KNNEngine
+
+        return KNNEngine.from_model(model)
+    if name in ("LogisticRegression", "SGDClassifier") and getattr(model, "loss", "log_loss") == "log_loss":
+        from engine import LinearEngine
+
+        return LinearEngine.from_model(model)
+    return model
+
+
+def load_scorer(path=None, tier="auto"):
+    """Load the model behind the fastest inference path available for it.
+
+    With tier="auto" and no explicit path (or the default model's own
+    path), a distilled fast tier (models/heart_model_fast.bin, see
+    distill.py) built from that model is served in front of it, escalating
+    borderline rows; tier="full" always serves the full model alone.
+    Artifacts load straight into their engine, so scikit-learn is only
+    imported for pickles.
+    """
+    source = path or default_model_path()
+    model = None
+    if not source.endswith(".pkl"):
+        from artifact import load_engine
+
+        model = load_engine(source)
+    if model is None:
+        model = _engine(load_model(source))
+    if tier == "auto" and source == default_model_path() and os.path.exists(FAST_ARTIFACT_PATH):
+        from distill import load_tiered
+
+        return load_tiered(model, FAST_ARTIFACT_PATH)
+    return model
+
+
+def predict_risk(model, X, record=False):
+    """Score a model matrix with a single predict_proba call.
+
+    Returns (labels, high_risk_probabilities); labels are derived from the
+    probabilities instead of a second model.predict pass. Serving paths pass
+    record=True so a tiered model counts the rows in heart_tier_rows_total;
+    internal scoring (pre-warm, what-if, benchmarks) leaves it off.
+    """
+    if record and getattr(model, "tiered", False):
+        probability = model.predict_proba(X, record=True)
+    else:
+        probability = model.predict_proba(X)
+    labels = model.classes_[probability.argmax(axis=1)]
+    return labels, probability[:, 1]
+
+
+def score_frame(model, frame):
+    """Score a cleaned- or raw-layout frame, keeping its original columns."""
+    features = clean(frame) if is_raw(frame) else frame
+    labels, high_risk = predict_risk(model, model_matrix(features), record=True)
+    scored = frame.copy()
+    scored["Risk Probability"] = high_risk
+    scored["Predicted Risk"] = labels
+    return scored
+
+
+def score_csv(model, source, destination, chunk_rows=CHUNK_ROWS):
+    """Stream a cleaned- or raw-layout CSV through the model chunk by chunk.
+
+    `source` is a path or file object readable by pandas, `destination` a
+    writable text file. Only one chunk is held in memory at a time. Yields
+    the running row count after each chunk so callers can report progress.
+    """
+    import pandas as pd
+
+    rows = 0
+    for chunk in pd.read_csv(source, chunksize=chunk_rows):
+        score_frame(model, chunk).to_csv(destination, header=rows == 0, index=False)
+        rows += len(chunk)
+        yield rows
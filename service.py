@@ -0,0 +1,270 @@
+"""Headless JSON scoring service.
+
+Run with `python service.py --port 8000` and POST patients in the cleaned
+dataset layout to /predict, either a single object or {"patients": [...]}.
+Concurrent requests are gathered into micro-batches so each batch costs a
+single predict_proba call. Repeat vectors are answered from an LRU cache
+whose counters are served at /cache; per-stage timings and prediction
+counters are served in Prometheus format at /metrics, and drift scores of
+the scored inputs against the training data at /drift. Without --model, the
+service switches to a newly published model version without a restart.
+--shadow models score every batch in the background and --candidate models
+answer requests sent to /predict?model=NAME; both load on first use, and
+their agreement with the primary and latency are served at /models.
+"""
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from cache import PredictionCache
+from drift import REFERENCE_PATH, load_monitor
+from features import INPUT_COLUMNS, model_matrix
+from metrics import METRICS, log_event, record_error, record_prediction
+from registry import IDLE_SECONDS, ModelRegistry, parse_spec
+from scoring import load_scorer, model_source, predict_risk
+from startup import STARTUP, first_prediction, prewarm
+
+
+class MicroBatcher:
+    """Collect feature rows from many threads and score them together.
+
+    A batch is flushed when it reaches `max_batch` rows or when `max_wait`
+    seconds have passed since its first row arrived, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch=256, max_wait=0.005, cache=None, registry=None):
+        self.model = model
+        self.cache = cache
+        self.registry = registry
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, X):
+        """Queue a (n, features) matrix; the future resolves to (labels, probabilities)."""
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            rows = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+            self._flush(pending)
+
+    def _flush(self, pending):
+        try:
+            score = self.cache.predict_risk if self.cache is not None else predict_risk
+            X_all = np.vstack([X for X, _ in pending])
+            start = time.perf_counter()
+            with METRICS.time("batch_predict_proba"):
+                labels, high_risk = score(self.model, X_all, record=True)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            record_error(e, "batch_predict_proba")
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        start = 0
+        for X, future in pending:
+            stop = start + len(X)
+            future.set_result((labels[start:stop], high_risk[start:stop]))
+            start = stop
+        # After the futures resolve, so responses never wait on the shadows
+        if self.registry is not None:
+            self.registry.shadow(X_all, labels, high_risk, elapsed)
+
+
+def watch_model(batcher, interval, tier="auto"):
+    """Swap the batcher onto newly published models, checking every `interval` seconds."""
+    def run():
+        source = model_source()
+        while True:
+            time.sleep(interval)
+            current = model_source()
+            if current == source:
+                continue
+            try:
+                batcher.model = load_scorer(current[0], tier)
+                source = current
+                log_event("model_reload", path=current[0], model_version=getattr(batcher.model, "model_version", None))
+            except Exception as e:
+                # Keep serving the old model; the next check retries
+                record_error(e, "model_reload")
+
+    thread = threading.Thread(target=run, name="model-watcher", daemon=True)
+    thread.start()
+    return thread
+
+
+def parse_columns(payload):
+    """The model's input columns of a request body, as lists."""
+    patients = payload.get("patients", [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(patients, list) or not patients:
+        raise ValueError("expected a patient object or a non-empty 'patients' list")
+    columns = {}
+    for column in INPUT_COLUMNS:
+        try:
+            columns[column] = [patient[column] for patient in patients]
+        except KeyError:
+            raise ValueError(f"patient is missing field '{column}'") from None
+        if any(value is None for value in columns[column]):
+            raise ValueError(f"field '{column}' must not be null")
+    return columns
+
+
+def parse_patients(payload):
+    return model_matrix(parse_columns(payload))
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # EHR bursts open many connections at once; the default backlog of 5 resets them
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def make_handler(batcher, timeout=10.0, drift=None, registry=None):
+    class PredictHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path != "/predict":
+                self._reply(404, {"error": "not found"})
+                return
+            # ?model=<name> scores with a registered model instead of the primary
+            name = parse_qs(url.query).get("model", [None])[0]
+            if name is not None and (registry is None or name not in registry.names()):
+                self._reply(404, {"error": f"no registered model {name!r}"})
+                return
+            start = time.perf_counter()
+            stages = {}
+            try:
+                with METRICS.time("parse", stages):
+                    length = int(self.headers.get("Content-Length", 0))
+                    columns = parse_columns(json.loads(self.rfile.read(length)))
+                    X = model_matrix(columns)
+            except (ValueError, TypeError) as e:
+                record_error(e, "parse")
+                self._reply(400, {"error": str(e)})
+                return
+            if drift is not None:
+                with METRICS.time("drift", stages):
+                    drift.observe(columns)
+            try:
+                # Includes time queued for a micro-batch
+                with METRICS.time("score", stages):
+                    if name is None:
+                        labels, high_risk = batcher.submit(X).result(timeout=timeout)
+                    else:
+                        labels, high_risk = registry.score(name, X)
+            except Exception as e:
+                record_error(e, "score")
+                self._reply(500, {"error": str(e)})
+                return
+            record_prediction(labels, time.perf_counter() - start, stages)
+            first_prediction()
+            self._reply(200, {"predictions": [
+                {"risk": int(label), "probability": float(p)} for label, p in zip(labels, high_risk)
+            ]})
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._send(200, METRICS.render().encode(), "text/plain; version=0.0.4")
+            elif self.path == "/cache" and batcher.cache is not None:
+                self._reply(200, batcher.cache.stats())
+            elif self.path == "/drift" and drift is not None:
+                self._reply(200, drift.report())
+            elif self.path == "/models" and registry is not None:
+                self._reply(200, registry.stats())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def _reply(self, status, body):
+            self._send(status, json.dumps(body).encode(), "application/json")
+
+        def _send(self, status, data, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve heart attack risk predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", help="model file (defaults to the published model, the artifact, then the pickle)")
+    parser.add_argument("--tier", choices=["auto", "full"], default="auto",
+                        help="'auto' serves a distilled fast tier in front of the model when one exists")
+    parser.add_argument("--max-batch", type=int, default=256, help="rows per micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="longest wait to fill a batch")
+    parser.add_argument("--cache-size", type=int, default=65536, help="cached predictions (0 disables)")
+    parser.add_argument("--reload-interval", type=float, default=5.0,
+                        help="seconds between checks for a newly published model (0 disables)")
+    parser.add_argument("--shadow", action="append", default=[], metavar="[NAME=]PATH",
+                        help="score every batch with this model too, in the background (repeatable)")
+    parser.add_argument("--candidate", action="append", default=[], metavar="[NAME=]PATH",
+                        help="register a model that requests can select with ?model=NAME (repeatable)")
+    parser.add_argument("--idle-seconds", type=float, default=IDLE_SECONDS,
+                        help="unload registered models unused for this long")
+    parser.add_argument("--drift-reference", default=REFERENCE_PATH,
+                        help="reference profile for input drift scores at /drift ('' disables)")
+    parser.add_argument("--log-level", default="WARNING", help="INFO logs one JSON line per request")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+
+    cache = PredictionCache(args.cache_size) if args.cache_size > 0 else None
+    registry = None
+    if args.shadow or args.candidate:
+        registry = ModelRegistry(args.idle_seconds)
+        for spec in args.shadow:
+            registry.register(*parse_spec(spec), shadow=True)
+        for spec in args.candidate:
+            registry.register(*parse_spec(spec))
+    # Load and pre-warm before listening, so the first request pays no setup cost
+    with STARTUP.phase("load_model"):
+        model = load_scorer(args.model, args.tier)
+    batcher = MicroBatcher(prewarm(model), args.max_batch, args.max_wait_ms / 1000, cache, registry)
+    if args.model is None and args.reload_interval > 0:
+        watch_model(batcher, args.reload_interval, args.tier)
+    drift = load_monitor(args.drift_reference) if args.drift_reference else None
+    server = ScoringServer((args.host, args.port), make_handler(batcher, drift=drift, registry=registry))
+    print(f"Serving predictions on http://{args.host}:{args.port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
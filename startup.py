@@ -0,0 +1,207 @@
+"""Cold-start timing, model pre-warm and a pre-warming launcher for the apps.
+
+`STARTUP` records how long each startup phase takes (imports, model load,
+pre-warm) and `first_prediction()` records the time from process start to
+the first prediction served, once per process, as
+heart_time_to_first_prediction_seconds. `scorer()` is the process-wide
+model loader the apps use, so a model loaded and pre-warmed by the
+launcher before the server starts is the one that serves the first
+request.
+
+    python startup.py                                 # cold-start breakdown of this process
+    python startup.py --target-seconds 1.5            # ... and fail if the first prediction is slower
+    python startup.py run heart.py --server.port 8501 # pre-warm, then start Streamlit
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _process_age():
+    """Seconds since this process started (Linux), or None."""
+    try:
+        with open("/proc/self/stat") as stat, open("/proc/uptime") as uptime:
+            started = int(stat.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+            return float(uptime.read().split()[0]) - started
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# perf_counter() value at process start; falls back to when this module was imported
+PROCESS_START = time.perf_counter() - (_process_age() or 0.0)
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases = {}
+        self.first_prediction = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            from metrics import METRICS
+
+            METRICS.observe("heart_startup_seconds", elapsed, phase=name)
+
+    def report(self):
+        return {"phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                "time_to_first_prediction": self.first_prediction}
+
+
+STARTUP = StartupTimer()
+
+
+def first_prediction():
+    """Record the time from process start to now if no prediction was served before; cheap afterwards."""
+    if STARTUP.first_prediction is not None:
+        return
+    with STARTUP._lock:
+        if STARTUP.first_prediction is not None:
+            return
+        STARTUP.first_prediction = seconds = time.perf_counter() - PROCESS_START
+    from metrics import METRICS, log_event
+
+    METRICS.observe("heart_time_to_first_prediction_seconds", seconds)
+    log_event("first_prediction", seconds=round(seconds, 6), **STARTUP.report())
+
+
+def dummy_patient():
+    """One valid patient in the cleaned layout: mid-range values and the first category of each column."""
+    from features import CATEGORIES, SCHEMA
+
+    patient = {}
+    for column, (kind, low, high) in SCHEMA.items():
+        if kind == "category":
+            patient[column] = [CATEGORIES[column][0]]
+        else:
+            high = high if high != float("inf") else low + 1
+            patient[column] = [int((low + high) // 2) if kind in ("int", "flag") else (low + high) / 2]
+    return patient
+
+
+def prewarm(model):
+    """Run one dummy prediction through the vectorizer and model so the first real one pays no setup cost."""
+    from features import Vectorizer
+    from scoring import predict_risk
+
+    with STARTUP.phase("prewarm"):
+        predict_risk(model, Vectorizer().transform(dummy_patient()))
+    return model
+
+
+_SCORERS = {}
+_SCORERS_LOCK = threading.Lock()
+
+
+def scorer(source=None, warm=True):
+    """The process-wide scoring model for `source` (scoring.model_source()), loaded and pre-warmed once.
+
+    Loads the file named in `source` itself, so a version published after
+    the caller read model_source() is never cached under the old key. Keeps
+    the two most recent sources, like the apps' model cache, so a newly
+    published version replaces the old one.
+    """
+    from scoring import load_scorer, model_source
+
+    source = source or model_source()
+    with _SCORERS_LOCK:
+        model = _SCORERS.get(source)
+        if model is None:
+            with STARTUP.phase("load_model"):
+                model = load_scorer(source[0])
+            if warm:
+                prewarm(model)
+            _SCORERS[source] = model
+            while len(_SCORERS) > 2:
+                _SCORERS.pop(next(iter(_SCORERS)))
+        return model
+
+
+# Modules heart.py imports when it loads, heaviest first; the model's own
+# modules (engine, artifact) are counted in the model load
+APP_IMPORTS = ["streamlit", "numpy", "scoring", "features", "pipeline", "cache"]
+# Modules heart.py defers until a patient is submitted and the first report is
+# drawn; the cohort tab's own imports are not on that path
+REPORT_IMPORTS = ["pandas", "metrics", "explain", "drift", "whatif"]
+
+
+def profile(imports=APP_IMPORTS, deferred=REPORT_IMPORTS):
+    """Import the app's dependencies, load and pre-warm the model and score one patient, timing each step.
+
+    The steps run in the app's order: module-load imports, model load and
+    pre-warm, then the `deferred` imports of the first report, each a
+    "deferred import" phase.
+    """
+    import importlib
+
+    # Interpreter startup, up to here
+    STARTUP.phases["interpreter"] = time.perf_counter() - PROCESS_START
+    for name in imports:
+        if name not in sys.modules:
+            with STARTUP.phase(f"import {name}"):
+                importlib.import_module(name)
+    model = scorer()
+    for name in deferred:
+        if name not in sys.modules:
+            with STARTUP.phase(f"deferred import {name}"):
+                importlib.import_module(name)
+
+    from features import Vectorizer
+    from scoring import predict_risk
+
+    with STARTUP.phase("first_prediction"):
+        predict_risk(model, Vectorizer().transform(dummy_patient()))
+    first_prediction()
+    return STARTUP.report()
+
+
+def run_streamlit(script, streamlit_args):
+    """Pre-warm in this process, then hand it to Streamlit, which only starts listening afterwards."""
+    for name in APP_IMPORTS:
+        with STARTUP.phase(f"import {name}"):
+            __import__(name)
+    scorer()
+    print(f"Pre-warmed in {time.perf_counter() - PROCESS_START:.2f} s since process start: "
+          + ", ".join(f"{name} {seconds * 1e3:.0f} ms" for name, seconds in STARTUP.phases.items()), flush=True)
+
+    from streamlit.web import cli
+
+    sys.argv = ["streamlit", "run", script, *streamlit_args]
+    sys.exit(cli.main())
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "run":
+        run_streamlit(sys.argv[2], sys.argv[3:])
+    parser = argparse.ArgumentParser(description="Time a cold start of the apps' prediction path.",
+                                     epilog="'python startup.py run SCRIPT [streamlit options]' pre-warms, "
+                                            "then serves SCRIPT with Streamlit.")
+    parser.add_argument("--json", action="store_true", help="print the breakdown as JSON")
+    parser.add_argument("--target-seconds", type=float, help="exit 1 if the first prediction takes longer")
+    args = parser.parse_args()
+
+    report = profile()
+    total = report["time_to_first_prediction"]
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for name, seconds in sorted(report["phases"].items(), key=lambda item: -item[1]):
+            print(f"{name:<24} {seconds * 1e3:>9.1f} ms")
+        print(f"{'time to first prediction':<24} {total * 1e3:>9.1f} ms")
+    if args.target_seconds is not None and total > args.target_seconds:
+        print(f"first prediction after {total:.2f} s misses the {args.target_seconds:.2f} s target", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
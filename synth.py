@@ -0,0 +1,261 @@
+"""Synthetic patients in the cleaned dataset layout, for testing at scale.
+
+A Gaussian copula is fitted to the base columns of the cleaned dataset: each
+column keeps its own marginal (the exact value frequencies of discrete and
+category columns, a quantile table of continuous ones) and the columns are
+tied together by a correlation matrix, calibrated in a few rounds so the
+sampled columns reproduce the dataset's Spearman correlations (ties in the
+discrete columns would otherwise weaken them). Sampling draws correlated
+normals, maps them back through the marginals and recomputes the engineered
+columns (By_Product, BMI_Stress, ...) with the pipeline's own
+add_derived_features, so they are exactly consistent with their base columns.
+Category codes take part in the copula, so only their marginals are meaningful,
+and only pairwise monotone dependence is modelled.
+
+The fitted model holds distributions, not rows, so it can be written out
+with `fit` and used where the real dataset may not be copied.
+
+    python synth.py generate synthetic.csv --rows 5000000   # streams chunks to disk
+    python synth.py fit                                     # models/synth_model.json: ship it instead of the data
+    python synth.py check --rows 200000                     # compare a sample with the real data
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.special import ndtr, ndtri
+
+from features import CATEGORIES, CATEGORY_CODES, SCHEMA
+from pipeline import CLEANED_COLUMNS, add_derived_features
+from scoring import MODELS_DIR
+
+CLEANED_PATH = "Cleaned Heart Attack Prediction Dataset.csv"
+MODEL_PATH = os.path.join(MODELS_DIR, "synth_model.json")
+# Computed from their base columns after sampling
+DERIVED_COLUMNS = ["By_Product", "BMI_Stress", "Sleep_Stress_Interaction", "Activity_Ratio", "Substance_Use"]
+BASE_COLUMNS = [column for column in CLEANED_COLUMNS if column not in DERIVED_COLUMNS]
+# Columns with at most this many distinct values are sampled from their exact frequencies
+DISCRETE_LIMIT = 1024
+# Points in the quantile table of a continuous column
+QUANTILES = 1001
+CHUNK_ROWS = 100_000
+# The cleaned CSV's precision; shorter floats also write faster
+FLOAT_FORMAT = "%.10g"
+# Rounds and sample size of the correlation calibration
+CALIBRATION_ROUNDS = 4
+CALIBRATION_ROWS = 50_000
+
+
+def _ranks(values):
+    """Average ranks of a column scaled into (0, 1), so ties share a rank."""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    upper = np.cumsum(counts)
+    return ((upper - counts / 2) / len(values))[inverse.ravel()]
+
+
+def _spearman(columns):
+    return np.corrcoef([_ranks(values) for values in columns])
+
+
+def fit(frame, source=None, rounds=CALIBRATION_ROUNDS):
+    """Copula model of a cleaned-layout frame, JSON-serializable."""
+    columns, scores = {}, []
+    for column in BASE_COLUMNS:
+        if column in CATEGORIES:
+            codes = np.array([CATEGORY_CODES[column][value] for value in frame[column]])
+            counts = np.bincount(codes, minlength=len(CATEGORIES[column]))
+            columns[column] = {"kind": "category", "values": CATEGORIES[column],
+                               "cdf": (np.cumsum(counts) / len(codes)).tolist()}
+            values = codes
+        else:
+            values = np.asarray(frame[column], dtype=np.float64)
+            unique, counts = np.unique(values, return_counts=True)
+            integer = SCHEMA.get(column, ("int",))[0] in ("int", "flag")
+            if len(unique) <= DISCRETE_LIMIT:
+                columns[column] = {"kind": "discrete", "values": unique.tolist(),
+                                   "cdf": (np.cumsum(counts) / len(values)).tolist(), "integer": integer}
+            else:
+                columns[column] = {"kind": "continuous",
+                                   "quantiles": np.quantile(values, np.linspace(0, 1, QUANTILES)).tolist(),
+                                   "integer": integer}
+        scores.append(values)
+    target = _spearman(scores)
+    correlation = np.corrcoef([ndtri(_ranks(values)) for values in scores])
+    model = {"source": source, "rows": len(frame), "columns": columns, "correlation": correlation.tolist()}
+    # Nudge each pair by how far the sampled Spearman correlation misses the data's
+    rng = np.random.default_rng(0)
+    for _ in range(rounds):
+        achieved = _spearman(Synthesizer(model)._draw(CALIBRATION_ROWS, rng))
+        correlation = _nearest_correlation(np.clip(correlation + target - achieved, -0.999, 0.999))
+        model["correlation"] = correlation.tolist()
+    return model
+
+
+def _nearest_correlation(matrix):
+    """Clip a correlation matrix to positive definite, keeping a unit diagonal."""
+    values, vectors = np.linalg.eigh(matrix)
+    repaired = vectors @ np.diag(np.maximum(values, 1e-6)) @ vectors.T
+    scale = np.sqrt(np.diag(repaired))
+    return repaired / np.outer(scale, scale)
+
+
+class Synthesizer:
+    """Draws cleaned-layout patient frames from a fitted copula model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = list(model["columns"])
+        self._factor = np.linalg.cholesky(_nearest_correlation(np.asarray(model["correlation"])))
+        self._specs = [model["columns"][column] for column in self.columns]
+        self._cdfs = [np.asarray(spec["cdf"]) if "cdf" in spec else None for spec in self._specs]
+        self._values = [np.asarray(spec["values"]) if "values" in spec else None for spec in self._specs]
+        self._quantiles = [np.asarray(spec["quantiles"]) if "quantiles" in spec else None for spec in self._specs]
+        self._grids = [np.linspace(0, 1, len(q)) if q is not None else None for q in self._quantiles]
+
+    def _draw(self, rows, rng):
+        """Base columns of `rows` patients, in self.columns order; categories as codes."""
+        uniform = ndtr(rng.standard_normal((rows, len(self.columns))) @ self._factor.T)
+        columns = []
+        for j, spec in enumerate(self._specs):
+            u = uniform[:, j]
+            if spec["kind"] == "continuous":
+                values = np.interp(u, self._grids[j], self._quantiles[j])
+                columns.append(np.rint(values).astype(np.int64) if spec["integer"] else values)
+                continue
+            # First value whose cumulative frequency reaches u
+            index = np.minimum(np.searchsorted(self._cdfs[j], u), len(self._cdfs[j]) - 1)
+            if spec["kind"] == "category":
+                columns.append(index)
+            else:
+                values = self._values[j][index]
+                columns.append(values.astype(np.int64) if spec["integer"] else values)
+        return columns
+
+    def sample(self, rows, rng):
+        """A DataFrame of `rows` synthetic patients in CLEANED_COLUMNS order."""
+        import pandas as pd
+
+        frame = dict(zip(self.columns, self._draw(rows, rng)))
+        for j, spec in enumerate(self._specs):
+            if spec["kind"] == "category":
+                frame[self.columns[j]] = self._values[j][frame[self.columns[j]]]
+        add_derived_features(frame)
+        return pd.DataFrame({column: frame[column] for column in CLEANED_COLUMNS})
+
+    def stream(self, rows, chunk_rows=CHUNK_ROWS, seed=0):
+        """Yield `rows` patients in frames of up to chunk_rows, reproducibly for a given seed."""
+        rng = np.random.default_rng(seed)
+        for start in range(0, rows, chunk_rows):
+            yield self.sample(min(chunk_rows, rows - start), rng)
+
+
+def load_synthesizer(model_path=None, data=CLEANED_PATH):
+    """A synthesizer from a saved model, or fitted on `data` (cleaned or raw layout)."""
+    if model_path:
+        with open(model_path) as file:
+            return Synthesizer(json.load(file))
+    return Synthesizer(fit(_load_cleaned(data), source=data))
+
+
+def _load_cleaned(path):
+    import pandas as pd
+
+    from pipeline import clean, is_raw
+
+    frame = pd.read_csv(path)
+    return clean(frame) if is_raw(frame) else frame
+
+
+def write_csv(synthesizer, destination, rows, chunk_rows=CHUNK_ROWS, seed=0, progress=True):
+    """Stream `rows` synthetic patients to a CSV; returns seconds taken."""
+    start = time.perf_counter()
+    written = 0
+    with open(destination, "w", newline="") as file:
+        for chunk in synthesizer.stream(rows, chunk_rows, seed):
+            chunk.to_csv(file, index=False, header=written == 0, float_format=FLOAT_FORMAT)
+            written += len(chunk)
+            if progress:
+                rate = written / (time.perf_counter() - start)
+                sys.stderr.write(f"\r{written:>12,} / {rows:,} rows  {rate:>10,.0f} rows/s   ")
+                sys.stderr.flush()
+    if progress:
+        sys.stderr.write("\n")
+    return time.perf_counter() - start
+
+
+# Pairs whose relationship the synthetic data has to keep
+KEY_PAIRS = [("Systolic_BP", "Diastolic_BP"), ("Systolic_BP", "By_Product"), ("Diastolic_BP", "By_Product"),
+             ("BMI", "BMI_Stress"), ("Stress Level", "BMI_Stress"), ("Stress Level", "Sleep_Stress_Interaction"),
+             ("Exercise Hours Per Week", "Activity_Ratio"), ("Smoking", "Substance_Use")]
+
+
+def compare(real, synthetic):
+    """Per-column PSI of `synthetic` against `real`, and Spearman correlations of both."""
+    from drift import DriftMonitor, build_reference
+
+    monitor = DriftMonitor(build_reference(real))
+    monitor.observe(synthetic)
+    numeric = [column for column in CLEANED_COLUMNS if column not in CATEGORIES]
+    real_corr = real[numeric].corr(method="spearman")
+    synthetic_corr = synthetic[numeric].corr(method="spearman")
+    return {
+        "columns": monitor.report()["columns"],
+        "pairs": [{"pair": [a, b], "real": float(real_corr.loc[a, b]), "synthetic": float(synthetic_corr.loc[a, b])}
+                  for a, b in KEY_PAIRS],
+        "max_correlation_gap": float(np.nanmax(np.abs(real_corr.values - synthetic_corr.values))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a copula to the cleaned dataset and generate synthetic patients.")
+    parser.add_argument("--data", default=CLEANED_PATH, help="dataset to fit (cleaned or raw layout)")
+    parser.add_argument("--model", help="saved copula model to use instead of fitting --data")
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+    save = commands.add_parser("fit", help="write the fitted model as JSON")
+    save.add_argument("--output", default=MODEL_PATH)
+    generate = commands.add_parser("generate", help="stream synthetic patients to a CSV")
+    generate.add_argument("destination")
+    generate.add_argument("--rows", type=int, default=1_000_000)
+    generate.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    generate.add_argument("--quiet", action="store_true", help="no progress line")
+    check = commands.add_parser("check", help="compare a synthetic sample with the real data")
+    check.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        model = fit(_load_cleaned(args.data), source=args.data)
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(model, file)
+        print(f"Fitted {len(model['columns'])} columns on {model['rows']:,} rows into {args.output}")
+        return
+
+    synthesizer = load_synthesizer(args.model, args.data)
+    if args.command == "generate":
+        seconds = write_csv(synthesizer, args.destination, args.rows, args.chunk_rows, args.seed,
+                            progress=not args.quiet)
+        print(f"Wrote {args.rows:,} synthetic patients to {args.destination} in {seconds:.1f} s "
+              f"({args.rows / max(seconds, 1e-9):,.0f} rows/s)")
+        return
+
+    start = time.perf_counter()
+    synthetic = synthesizer.sample(args.rows, np.random.default_rng(args.seed))
+    seconds = time.perf_counter() - start
+    result = compare(_load_cleaned(args.data), synthetic)
+    print(f"Sampled {args.rows:,} rows in {seconds:.2f} s; largest Spearman correlation gap "
+          f"{result['max_correlation_gap']:.3f}")
+    print(f"{'pair':<52} {'real':>7} {'synth':>7}")
+    for row in result["pairs"]:
+        print(f"{' / '.join(row['pair']):<52} {row['real']:>7.3f} {row['synthetic']:>7.3f}")
+    print(f"{'column':<34} {'psi':>8}  status")
+    for row in sorted(result["columns"], key=lambda row: -(row["psi"] or 0)):
+        print(f"{row['column']:<34} {row['psi']:>8.4f}  {row['status']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from drift import CLEANED_PATH, DriftMonitor, build_reference
+from features import CATEGORY_CODES
+
+
+def _frames():
+    frame = pd.read_csv(CLEANED_PATH, nrows=500)
+    coded = frame.copy()
+    for column, codes in CATEGORY_CODES.items():
+        coded[column] = coded[column].map(codes)
+    unknown = frame.copy()
+    unknown.loc[0, "Diet"] = "Keto"
+    return build_reference(frame), [frame, coded, unknown]
+
+
+def test_single_and_batch_observations_count_alike():
+    reference, frames = _frames()
+    for frame in frames:
+        batch, single = DriftMonitor(reference), DriftMonitor(reference)
+        batch.observe(frame)
+        for record in frame.to_dict("records"):
+            single.observe({column: [value] for column, value in record.items()})
+        np.testing.assert_array_equal(batch._counts, single._counts)
+        np.testing.assert_array_equal(batch._rows, single._rows)
+
+
+def test_numeric_codes_count_as_their_category():
+    reference, (frame, coded, _) = _frames()
+    named, numeric = DriftMonitor(reference), DriftMonitor(reference)
+    named.observe(frame)
+    numeric.observe(coded)
+    np.testing.assert_array_equal(named._counts, numeric._counts)
@@ -0,0 +1,275 @@
+"""Cross-validated model search that produces a new model.
+
+Candidate configurations are scored with stratified k-fold cross-validation
+in a process pool, one (configuration, fold) fit per task. Successive
+halving prunes the search: every configuration is first scored on a small
+share of each training fold, and only the best 1/eta of them move on to
+the next rung with eta times the rows, until the survivors see the full
+folds. The best configuration is refit on the whole dataset.
+
+Fold splits and their preprocessed training matrices (minority class
+oversampled with SMOTE, as the shipped model was trained) are built once
+per fold and rung and saved as .npy files that every worker memory-maps,
+so no worker recomputes or receives a private copy of them.
+
+Outputs go to models/ by default (trained_model.pkl, trained_model.bin and
+training_report.json), so a run never overwrites the shipped model; pass
+--output heart_model.pkl --artifact heart_model.bin to replace it.
+
+    python train.py                                   # writes models/trained_model.*, models/training_report.json
+    python train.py --jobs 8 --folds 5 --output candidate.pkl --artifact candidate.bin
+"""
+import argparse
+import json
+import math
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from features import model_matrix
+from scoring import ARTIFACT_PATH, CURRENT_POINTER, MODEL_PATH, MODELS_DIR
+
+CLEANED_PATH = "Cleaned Heart Attack Prediction Dataset.csv"
+OUTPUT_PATH = os.path.join(MODELS_DIR, "trained_model.pkl")
+ARTIFACT_OUTPUT_PATH = os.path.join(MODELS_DIR, "trained_model.bin")
+REPORT_PATH = os.path.join(MODELS_DIR, "training_report.json")
+TARGET = "Heart Attack Risk"
+
+# family -> list of parameter settings
+SEARCH_SPACE = {
+    "knn": [{"n_neighbors": k, "weights": w} for k in (3, 5, 7, 9, 11, 15, 21, 31) for w in ("uniform", "distance")],
+    "logistic": [{"C": c} for c in (0.01, 0.1, 1.0, 10.0)],
+    "forest": [{"max_depth": d, "min_samples_leaf": leaf} for d in (6, 10, None) for leaf in (1, 5, 20)],
+}
+
+
+def make_estimator(family, params, seed=0):
+    if family == "knn":
+        from sklearn.neighbors import KNeighborsClassifier
+
+        return KNeighborsClassifier(**params)
+    if family == "logistic":
+        from sklearn.linear_model import LogisticRegression
+
+        return LogisticRegression(max_iter=1000, **params)
+    if family == "forest":
+        from sklearn.ensemble import RandomForestClassifier
+
+        return RandomForestClassifier(n_estimators=200, n_jobs=1, random_state=seed, **params)
+    raise ValueError(f"unknown model family {family!r}")
+
+
+def smote(X, y, k=5, seed=0):
+    """Oversample every minority class to the majority count by interpolating between same-class neighbours."""
+    from sklearn.neighbors import NearestNeighbors
+
+    rng = np.random.default_rng(seed)
+    classes, counts = np.unique(y, return_counts=True)
+    parts_X, parts_y = [X], [y]
+    for label, count in zip(classes, counts):
+        needed = counts.max() - count
+        if not needed or count < 2:
+            continue
+        members = X[y == label]
+        neighbors = NearestNeighbors(n_neighbors=min(k, count - 1) + 1).fit(members)
+        _, indices = neighbors.kneighbors(members)
+        base = rng.integers(0, count, needed)
+        partner = indices[base, rng.integers(1, indices.shape[1], needed)]
+        gap = rng.random((needed, 1))
+        parts_X.append(members[base] + gap * (members[partner] - members[base]))
+        parts_y.append(np.full(needed, label, dtype=y.dtype))
+    return np.concatenate(parts_X), np.concatenate(parts_y)
+
+
+def prepare_folds(X, y, folds, budgets, directory, seed=0):
+    """Write each fold's validation rows and per-rung training matrices as .npy files.
+
+    Returns {(fold, rung): {"train_X", "train_y", "test_X", "test_y"}} of paths.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    rng = np.random.default_rng(seed)
+    paths = {}
+    splits = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(X, y)
+    for fold, (train, test) in enumerate(splits):
+        np.save(os.path.join(directory, f"fold{fold}_test_X.npy"), X[test])
+        np.save(os.path.join(directory, f"fold{fold}_test_y.npy"), y[test])
+        # Lower rungs train on a nested subsample of the fold, so survivors see a superset
+        order = rng.permutation(train)
+        for rung, rows in enumerate(budgets):
+            subset = np.sort(order[:rows])
+            train_X, train_y = smote(X[subset], y[subset], seed=seed + fold)
+            entry = {"test_X": f"fold{fold}_test_X.npy", "test_y": f"fold{fold}_test_y.npy"}
+            for name, array in (("train_X", train_X), ("train_y", train_y)):
+                entry[name] = f"fold{fold}_rung{rung}_{name}.npy"
+                np.save(os.path.join(directory, entry[name]), array)
+            paths[fold, rung] = {name: os.path.join(directory, file) for name, file in entry.items()}
+    return paths
+
+
+# Worker-side cache of memory-mapped fold matrices, filled on first use
+_MATRICES = {}
+
+
+def _matrix(path):
+    if path not in _MATRICES:
+        _MATRICES[path] = np.load(path, mmap_mode="r")
+    return _MATRICES[path]
+
+
+def _evaluate(family, params, paths, seed):
+    """Fit one configuration on one fold; runs in a worker process."""
+    from sklearn.metrics import accuracy_score, roc_auc_score
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    model = make_estimator(family, params, seed)
+    model.fit(_matrix(paths["train_X"]), _matrix(paths["train_y"]))
+    fit_seconds = time.perf_counter() - wall_start
+    test_X, test_y = _matrix(paths["test_X"]), _matrix(paths["test_y"])
+    probability = model.predict_proba(test_X)[:, 1]
+    return {
+        "roc_auc": roc_auc_score(test_y, probability),
+        "accuracy": accuracy_score(test_y, model.classes_[(probability >= 0.5).astype(int)]),
+        "fit_seconds": fit_seconds,
+        "cpu_seconds": time.process_time() - cpu_start,
+    }
+
+
+def search(X, y, space=SEARCH_SPACE, folds=5, eta=3, rungs=3, jobs=None, scoring="roc_auc", seed=0, log=print):
+    """Successive-halving cross-validated search; returns (best configuration, report)."""
+    jobs = jobs or os.cpu_count()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    configs = [{"family": family, "params": params, "rungs": []}
+               for family, settings in space.items() for params in settings]
+    train_rows = len(y) - len(y) // folds
+    budgets = [max(50, train_rows // eta ** (rungs - 1 - rung)) for rung in range(rungs)]
+
+    directory = tempfile.mkdtemp(prefix="heart_folds_")
+    worker_cpu = 0.0
+    try:
+        paths = prepare_folds(X, y, folds, budgets, directory, seed)
+        alive = list(range(len(configs)))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for rung, rows in enumerate(budgets):
+                rung_start = time.perf_counter()
+                futures = {(i, fold): pool.submit(_evaluate, configs[i]["family"], configs[i]["params"],
+                                                  paths[fold, rung], seed)
+                           for i in alive for fold in range(folds)}
+                for i in alive:
+                    results = [futures[i, fold].result() for fold in range(folds)]
+                    worker_cpu += sum(r["cpu_seconds"] for r in results)
+                    scores = np.array([r[scoring] for r in results])
+                    configs[i]["rungs"].append({
+                        "rung": rung,
+                        "train_rows": rows,
+                        "mean": float(scores.mean()),
+                        "std": float(scores.std()),
+                        "accuracy": float(np.mean([r["accuracy"] for r in results])),
+                        "fit_seconds": float(np.mean([r["fit_seconds"] for r in results])),
+                    })
+                alive.sort(key=lambda i: -configs[i]["rungs"][-1]["mean"])
+                keep = alive if rung == len(budgets) - 1 else alive[:max(1, math.ceil(len(alive) / eta))]
+                for i in alive[len(keep):]:
+                    configs[i]["eliminated_at"] = rung
+                log(f"rung {rung}: {len(alive):>3} configurations x {folds} folds on {rows:,} rows "
+                    f"in {time.perf_counter() - rung_start:.1f} s; best {scoring} {configs[alive[0]]['rungs'][-1]['mean']:.4f}")
+                alive = keep
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    wall = time.perf_counter() - wall_start
+    cpu = worker_cpu + time.process_time() - cpu_start
+    best = configs[alive[0]]
+    report = {
+        "scoring": scoring,
+        "folds": folds,
+        "eta": eta,
+        "jobs": jobs,
+        "rows": int(len(y)),
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "cpu_utilization": cpu / (wall * jobs),
+        "best": {"family": best["family"], "params": best["params"], scoring: best["rungs"][-1]["mean"]},
+        "configurations": configs,
+    }
+    return best, report
+
+
+def train(data_path=CLEANED_PATH, output=OUTPUT_PATH, artifact=ARTIFACT_OUTPUT_PATH, report_path=REPORT_PATH,
+          seed=0, log=print, **search_options):
+    import pandas as pd
+
+    frame = pd.read_csv(data_path)
+    X, y = model_matrix(frame), frame[TARGET].to_numpy(dtype=np.int64)
+    best, report = search(X, y, seed=seed, log=log, **search_options)
+
+    # Refit the winner on every row, oversampled like the training folds
+    model = make_estimator(best["family"], best["params"], seed)
+    model.fit(*smote(X, y, seed=seed))
+    for path in (output, artifact, report_path):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(output, "wb") as file:
+        pickle.dump(model, file)
+    report["model"] = output
+    if artifact:
+        from artifact import export_model
+
+        try:
+            report["artifact"] = artifact
+            report["model_version"] = export_model(model, artifact)
+        except TypeError:
+            # A stale artifact would shadow the new pickle in scoring.load_model
+            if os.path.exists(artifact):
+                os.remove(artifact)
+            report["artifact"] = None
+            log(f"{best['family']} models have no artifact format; removed {artifact}, loaders will use {output}")
+    if os.path.exists(CURRENT_POINTER):
+        log(f"{CURRENT_POINTER} names a published online model, which loaders use ahead of {output}")
+    elif os.path.abspath(output) != os.path.abspath(MODEL_PATH):
+        log(f"loaders keep serving the shipped model; "
+            f"pass --output {MODEL_PATH} --artifact {ARTIFACT_PATH} to replace it")
+    if report_path:
+        with open(report_path, "w") as file:
+            json.dump(report, file, indent=2)
+    return model, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated model search that writes a new model.")
+    parser.add_argument("--data", default=CLEANED_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH, help="pickle to write")
+    parser.add_argument("--artifact", default=ARTIFACT_OUTPUT_PATH, help="artifact to export ('' to skip)")
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--families", nargs="+", choices=sorted(SEARCH_SPACE), default=sorted(SEARCH_SPACE))
+    parser.add_argument("--jobs", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--eta", type=int, default=3, help="keep the best 1/eta configurations per rung")
+    parser.add_argument("--rungs", type=int, default=3)
+    parser.add_argument("--scoring", choices=["roc_auc", "accuracy"], default="roc_auc")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _, report = train(args.data, args.output, args.artifact, args.report, seed=args.seed,
+                      space={family: SEARCH_SPACE[family] for family in args.families}, folds=args.folds,
+                      eta=args.eta, rungs=args.rungs, jobs=args.jobs, scoring=args.scoring)
+
+    print(f"\n{'configuration':<48} {'rows':>7} {args.scoring:>9} {'± std':>7} {'fit s':>7}")
+    ranked = sorted(report["configurations"], key=lambda c: (-len(c["rungs"]), -c["rungs"][-1]["mean"]))
+    for config in ranked:
+        last = config["rungs"][-1]
+        name = f"{config['family']} {json.dumps(config['params'])}"
+        print(f"{name:<48} {last['train_rows']:>7,} {last['mean']:>9.4f} {last['std']:>7.4f} {last['fit_seconds']:>7.2f}")
+    print(f"\nbest: {report['best']}")
+    print(f"wall {report['wall_seconds']:.1f} s, cpu {report['cpu_seconds']:.1f} s on {report['jobs']} workers "
+          f"({report['cpu_utilization']:.0%} utilization)")
+    print(f"wrote {report['model']}" + (f" and {report['artifact']}" if report.get("artifact") else ""))
+
+
+if __name__ == "__main__":
+    main()